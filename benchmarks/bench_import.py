@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Measures the time it takes to define (import) a large schema of Structs, and to finalize it.
+
+Usage: python benchmarks/bench_import.py [number of structs]
+"""
+import sys
+import time
+
+import hydration as h
+
+
+def define_schema(count: int):
+    class Header(h.Struct, endianness=h.BigEndian):
+        magic = h.UInt32(0xDEADBEEF)
+        opcode = h.UInt16()
+        length = h.UInt16()
+
+    class Address(h.Struct):
+        ip = h.IPv4()
+        port = h.UInt16()
+
+    structs = []
+    for i in range(count):
+        # Every struct inherits a header, nests another struct and has a VLA, like a typical protocol message
+        class Body(Header, endianness=h.BigEndian):
+            src = Address
+            dst = Address
+            seq = h.UInt64()
+            flags = h.Array(4, h.UInt8, fill=True)
+            data_len = h.UInt16()
+            data = h.Vector(data_len, h.UInt32)
+
+        Body.__qualname__ = Body.__name__ = 'Body{}'.format(i)
+        structs.append(Body)
+    return structs
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    start = time.perf_counter()
+    structs = define_schema(count)
+    defined = time.perf_counter()
+    for struct in structs:
+        struct.finalize()
+    finalized = time.perf_counter()
+
+    print('Defined {} structs in {:.3f}s'.format(count, defined - start))
+    print('Finalized them in {:.3f}s'.format(finalized - defined))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Measures the time it takes to build Vectors item by item (with append, insert and extend), and to serialize them.
+
+Usage: python benchmarks/bench_vector_append.py [number of items]
+"""
+import sys
+import time
+
+import hydration as h
+
+
+class Point(h.Struct):
+    x = h.UInt32()
+    y = h.UInt32()
+
+
+class Points(h.Struct):
+    count = h.UInt32()
+    points = h.Vector(count, Point)
+    values = h.Vector(count, h.UInt32(validator=range(2 ** 32)))
+
+
+def measure(name: str, func, count: int):
+    start = time.perf_counter()
+    func(count)
+    elapsed = time.perf_counter() - start
+    print('{}: {} items in {:.3f}s ({:.2f}us per item)'.format(name, count, elapsed, elapsed / count * 1e6))
+
+
+def append_scalars(count: int):
+    points = Points()
+    for i in range(count):
+        points.values.append(i)
+
+
+def append_structs(count: int):
+    points = Points()
+    for i in range(count):
+        points.points.append(Point(x=i, y=i))
+
+
+def insert_scalars(count: int):
+    points = Points()
+    for i in range(count):
+        points.values.insert(0, i)
+
+
+def extend_scalars(count: int):
+    points = Points()
+    for i in range(0, count, 10):
+        points.values.extend(range(i, i + 10))
+
+
+def serialize(count: int):
+    points = Points()
+    points.values.extend(range(count))
+    points.count = count
+    bytes(points)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    measure('Append scalars', append_scalars, count)
+    measure('Append structs', append_structs, count)
+    measure('Insert scalars', insert_scalars, count)
+    measure('Extend scalars', extend_scalars, count)
+    measure('Serialize', serialize, count)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,10 +3,14 @@ from .endianness import Endianness
 from .scalars import (UInt8, UInt16, UInt32, UInt64,
                       Int8, Int16, Int32, Int64,
                       Float, Double, Enum)
-from .vectors import Array, Vector, IPv4
+from .vectors import Array, Vector, Bytes, Blob
+from .addresses import IPv4, IPv6
 from .validators import ExactValueValidator, RangeValidator, FunctionValidator, SetValidator
-from .message import Message, InclusiveLengthField, ExclusiveLengthField, OpcodeField
-from .fields import FieldPlaceholder
+from .message import Message, InclusiveLengthField, ExclusiveLengthField, OpcodeField, ChecksumField, sendmsg
+from .fields import FieldPlaceholder, Switch
+from .decoder import Decoder, FrameSplitter
+from .memory import memory_report, track_allocations
+from .records import StructArray
 
 pre_bytes_hook = Struct.pre_bytes_hook
 post_bytes_hook = Struct.post_bytes_hook
@@ -22,8 +26,9 @@ __all__ = ['Struct', 'Endianness',
            'UInt8', 'UInt16', 'UInt32', 'UInt64',
            'Int8', 'Int16', 'Int32', 'Int64',
            'Float', 'Double', 'Enum',
-           'Array', 'Vector', 'IPv4', 'FieldPlaceholder',
+           'Array', 'Vector', 'Bytes', 'Blob', 'IPv4', 'IPv6', 'FieldPlaceholder', 'Switch',
            'ExactValueValidator', 'RangeValidator', 'FunctionValidator', 'SetValidator',
-           'Message', 'InclusiveLengthField', 'ExclusiveLengthField', 'OpcodeField',
+           'Message', 'InclusiveLengthField', 'ExclusiveLengthField', 'OpcodeField', 'ChecksumField',
+           'sendmsg', 'Decoder', 'FrameSplitter', 'memory_report', 'track_allocations', 'StructArray',
            'pre_bytes_hook', 'post_bytes_hook', 'from_bytes_hook',
            'LittleEndian', 'BigEndian', 'NativeEndian', 'NetworkEndian']
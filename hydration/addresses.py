@@ -0,0 +1,152 @@
+import abc
+import ipaddress
+import socket
+from typing import Union, Optional, Iterable
+
+from .fields import Field
+from .helpers import touch
+from .validators import ValidatorABC, ValidatorType, as_validator
+
+AddressType = Union[str, bytes, int, ipaddress.IPv4Address, ipaddress.IPv6Address, Iterable[int]]
+
+
+class _IPAddress(Field):
+    """
+    An IP address, stored in its' packed (network) form. It's serialized and deserialized by copying the bytes,
+    conversions to and from strings are done only when needed.
+    """
+    _length: int
+    _address_class: type
+
+    def __init__(self, value: AddressType = 0, validator: Optional[ValidatorType] = None):
+        self.validator = as_validator(validator)
+        self.value = value
+
+    @property
+    def validator(self) -> ValidatorABC:
+        return self._validator
+
+    @validator.setter
+    def validator(self, value: ValidatorABC):
+        self._validator = value
+
+    @property
+    def value(self) -> str:
+        return self._to_str(self._packed)
+
+    @value.setter
+    def value(self, value: AddressType):
+        packed = self._pack(value)
+        if self.validator:
+            self.validator.validate(self._to_str(packed))
+        self._packed = packed
+        touch(self)
+
+    @property
+    def packed(self) -> bytes:
+        """
+        :return: The address in its' packed (network) form
+        """
+        return self._packed
+
+    @property
+    def address(self):
+        """
+        :return: The address as an ipaddress object
+        """
+        return self._address_class(self._packed)
+
+    def _pack(self, value: AddressType) -> bytes:
+        if isinstance(value, str):
+            try:
+                return self._from_str(value)
+            except OSError as e:
+                raise ValueError('Invalid {} address: {}'.format(self.__class__.__qualname__, value)) from e
+        elif isinstance(value, (bytes, bytearray, memoryview)):
+            packed = bytes(value)
+        elif isinstance(value, (int, ipaddress.IPv4Address, ipaddress.IPv6Address)):
+            packed = self._address_class(value).packed
+        else:
+            packed = bytes(int(x) for x in value)
+
+        if len(packed) != self._length:
+            raise ValueError('IP length mismatch. Expected {}, got {}'.format(self._length, len(packed)))
+        return packed
+
+    @abc.abstractmethod
+    def _from_str(self, value: str) -> bytes:
+        pass
+
+    @abc.abstractmethod
+    def _to_str(self, packed: bytes) -> str:
+        pass
+
+    def __repr__(self) -> str:
+        return '{}({!r})'.format(self.__class__.__qualname__, self.value)
+
+    def __str__(self) -> str:
+        return self.value
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __bytes__(self) -> bytes:
+        return self._packed
+
+    def from_bytes(self, data: bytes):
+        self.value = bytes(data)
+        return self
+
+    def decode(self, data: bytes, offset: int = 0) -> int:
+        self.value = data[offset:offset + self._length]
+        return self._length
+
+    def _layout_info(self):
+        return self._length, '={}s'.format(self._length)
+
+    def __eq__(self, other):
+        if isinstance(other, _IPAddress):
+            return self._packed == other.packed
+        try:
+            return self._packed == self._pack(other)
+        except (ValueError, TypeError):
+            return False
+
+    def __ne__(self, other):
+        return not self == other
+
+
+class IPv4(_IPAddress):
+    """
+    An IPv4 address (4 bytes). The value is the address as a string, but it can be set to a string,
+    packed bytes, an int, an ipaddress.IPv4Address or 4 ints.
+    """
+    _length = 4
+    _address_class = ipaddress.IPv4Address
+
+    def __init__(self, value: AddressType = '0.0.0.0', validator: Optional[ValidatorType] = None):
+        super().__init__(value, validator)
+
+    def _from_str(self, value: str) -> bytes:
+        return socket.inet_pton(socket.AF_INET, value)
+
+    def _to_str(self, packed: bytes) -> str:
+        return socket.inet_ntoa(packed)
+
+
+class IPv6(_IPAddress):
+    """
+    An IPv6 address (16 bytes). The value is the address as a string, but it can be set to a string,
+    packed bytes, an int, an ipaddress.IPv6Address or 16 ints.
+    """
+    _length = 16
+    _address_class = ipaddress.IPv6Address
+
+    def __init__(self, value: AddressType = '::', validator: Optional[ValidatorType] = None):
+        super().__init__(value, validator)
+
+    def _from_str(self, value: str) -> bytes:
+        return socket.inet_pton(socket.AF_INET6, value)
+
+    def _to_str(self, packed: bytes) -> str:
+        return socket.inet_ntop(socket.AF_INET6, packed)
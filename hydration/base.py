@@ -1,80 +1,145 @@
 import copy
 import inspect
 import struct
+import threading
+import types
 from collections import OrderedDict
-from contextlib import suppress
-from pyhooks import Hook, precall_register, postcall_register
-from typing import Callable, List, Iterable, Optional
+from contextlib import suppress, contextmanager, ExitStack
+from functools import lru_cache
+from pyhooks import Hook, precall_register, postcall_register, collect_tags_by_hook
+from typing import Callable, List, Iterable, Optional, Iterator, Union, Generator
 
-from .helpers import as_obj, assert_no_property_override, as_type
+from . import memory
+from .helpers import as_obj, assert_no_property_override, as_type, touch, coalesce_buffers
 from .scalars import Scalar, Enum
-from .fields import Field, VLA, FieldPlaceholder
+from .fields import Field, VLA, FieldPlaceholder, Switch
 from .endianness import Endianness
+from .layout import StructLayout
 
 illegal_field_names = ['value', 'validate', '_fields']
 
+# Classes are finalized while holding this lock, so a class that's first used by several threads is finalized once.
+# It's reentrant since finalizing a class finalizes its' bases.
+_finalize_lock = threading.RLock()
 
-class StructMeta(type):
-    # noinspection PyProtectedMember
-    def __new__(mcs, name, bases, attributes, endianness: Optional[Endianness] = None, footer: Optional[bool] = False):
-
-        # Load all the fields from the parent classes
-        base_fields = OrderedDict()  # Contains all the 'regular' fields
-        footer_fields = OrderedDict()  # Similar to the 'regular' fields, but they will be appended in the end
-        for base in filter(lambda x: issubclass(x, Struct), bases):
-            for field_name in base._field_names:
-                if hasattr(base, '_footer') and base._footer:
-                    footer_fields[field_name] = copy.deepcopy(getattr(base, field_name))
-                else:
-                    base_fields[field_name] = copy.deepcopy(getattr(base, field_name))
 
-        # Check to see if any of the current attributes have already been defined
-        for field_name in attributes.keys():
-            if field_name in base_fields or field_name in footer_fields:
-                raise NameError("Field '{}' was defined more than once".format(field_name))
+class StructMeta(type):
+    """
+    Struct classes are defined lazily, only the names of the fields are resolved when the class is created.
+    The rest (copying inherited fields, resolving VLA lengths, setting endianness) is done by `finalize`,
+    which is called when the Struct is first used (instantiated, or its' layout is needed).
+    """
 
-        # Update the current attributes with the fields from the parents (in order)
-        base_fields.update(attributes)
-        base_fields.update(footer_fields)
-        attributes = base_fields
+    # noinspection PyProtectedMember
+    def __new__(mcs, name, bases, attributes, endianness: Optional[Endianness] = None, footer: Optional[bool] = False,
+                cached: Optional[bool] = False):
 
         # Save some metadata in private members
         # Whether the Struct is a footer or not, used to determine order of attributes in child classes
         attributes['_footer'] = footer
 
-        # Save field names as an attribute, used to iterate over the fields (in order)
-        attributes['_field_names'] = []
+        # Whether instances of the Struct keep their serialized bytes between calls to serialize
+        attributes['_cached'] = cached
 
         # Check if the metaclass is running for class Struct itself, in which case, it won't have any fields
         if not bases:
+            attributes['_field_names'] = []
             return super().__new__(mcs, name, bases, attributes)
 
-        # Some fields/api require extra logic, so it's executed here
+        # Load the field names from the parent classes
+        base_names = []  # Contains all the 'regular' fields
+        footer_names = []  # Similar to the 'regular' fields, but they will be appended in the end
+        for base in filter(lambda x: issubclass(x, Struct), bases):
+            if base._footer:
+                footer_names.extend(base._field_names)
+            else:
+                base_names.extend(base._field_names)
+
+        # Check to see if any of the current attributes have already been defined
+        for field_name in attributes.keys():
+            if field_name in base_names or field_name in footer_names:
+                raise NameError("Field '{}' was defined more than once".format(field_name))
+
+        own_fields = OrderedDict()
         for field_name, field_obj in attributes.items():
 
             # Ignore attributes that aren't hydra fields or structs
             if not issubclass(as_type(field_obj), (Field, Struct)):
                 continue
 
-            # Convert to object (this is to support non-instantiated Structs
-            field_obj = as_obj(field_obj)
-            attributes['_field_names'].append(field_name)
-            attributes[field_name] = field_obj
+            own_fields[field_name] = field_obj
 
             '''
             Nested struct act as fields, so make sure the properties are not overridden
             by fields with the same name
             '''
-            if isinstance(field_obj, Struct):
+            if issubclass(as_type(field_obj), Struct):
                 assert_no_property_override(field_obj, Struct)
 
+        # Save field names as an attribute, used to iterate over the fields (in order)
+        attributes['_field_names'] = base_names + list(own_fields) + footer_names
+
+        # The definition is kept until the class is finalized, until then the fields are lazy attributes
+        attributes['_definition'] = (bases, own_fields, endianness)
+        for field_name in attributes['_field_names']:
+            attributes[field_name] = _LazyField(field_name)
+
+        return super().__new__(mcs, name, bases, attributes)
+
+    def __call__(cls, *args, **kwargs):
+        if '_definition' in vars(cls):
+            cls.finalize()
+        return super().__call__(*args, **kwargs)
+
+    # noinspection PyProtectedMember
+    def finalize(cls):
+        """
+        Finish defining the Struct's fields. This is done automatically when the Struct is first used,
+        but may be called explicitly (e.g. to avoid the delay when a Struct is first used).
+        """
+        if '_definition' not in vars(cls):
+            return
+        with _finalize_lock:
+            # Another thread may have finalized the class while this one waited for the lock
+            definition = vars(cls).get('_definition')
+            if definition is not None:
+                cls._finalize(*definition)
+
+    # noinspection PyProtectedMember
+    def _finalize(cls, bases, own_fields, endianness):
+
+        # Load all the fields from the parent classes
+        fields = OrderedDict()  # Contains all the 'regular' fields
+        footer_fields = OrderedDict()  # Similar to the 'regular' fields, but they will be appended in the end
+        for base in filter(lambda x: issubclass(x, Struct), bases):
+            base.finalize()
+            for field_name in base._field_names:
+                if base._footer:
+                    footer_fields[field_name] = copy.deepcopy(getattr(base, field_name))
+                else:
+                    fields[field_name] = copy.deepcopy(getattr(base, field_name))
+
+        # Update the current fields with the fields from the parents (in order)
+        for field_name, field_obj in own_fields.items():
+            # Convert to object (this is to support non-instantiated Structs
+            fields[field_name] = as_obj(field_obj)
+        fields.update(footer_fields)
+
+        # Some fields/api require extra logic, so it's executed here
+        for field_name in own_fields:
+            field_obj = fields[field_name]
+
             '''
             VLA's length field name must be resolved (if not already given)
             '''
             if isinstance(field_obj, VLA) and not field_obj.length_field_name:
                 # Look for the name of the field which has the VLA's length
-                field_obj.find_and_set_field_name(attributes)
+                field_obj.find_and_set_field_name(fields)
+            # Same for the discriminator of a Switch
+            elif isinstance(field_obj, Switch) and not field_obj.discriminator_name:
+                field_obj.find_and_set_field_name(fields)
 
+        for field_obj in fields.values():
             # If endianness was given, change endianness (only if it's default)
             if endianness:
                 # In case the field IS a scalar
@@ -87,21 +152,115 @@ class StructMeta(type):
                     if not field_obj.type._endianness_format:
                         field_obj.type.endianness_format = endianness
 
-        return super().__new__(mcs, name, bases, attributes)
+        discriminated = {}
+        for field_name, field_obj in fields.items():
+            if isinstance(field_obj, Switch):
+                discriminated.setdefault(field_obj.discriminator_name, []).append(field_name)
+        cls._discriminated = discriminated
+
+        for field_name, field_obj in fields.items():
+            setattr(cls, field_name, field_obj)
+        delattr(cls, '_definition')
 
     def __len__(self):
         return len(self())
 
+    @property
+    def layout(cls) -> StructLayout:
+        """
+        The static layout (offsets, sizes and formats) of the Struct's fields, computed when first needed
+        """
+        if '_compiled_layout' not in vars(cls):
+            cls.finalize()
+            cls._compiled_layout = StructLayout((name, getattr(cls, name)) for name in cls._field_names)
+        return vars(cls)['_compiled_layout']
+
+    @property
+    def ctypes_type(cls) -> type:
+        """
+        An equivalent ctypes Structure (packed, with the same byte order), created when first needed.
+        Only Structs with a fixed size, whose fields have the same byte order, have one.
+        Use `ctypes_type.from_buffer` for access to the fields of serialized Structs (without copying them).
+        """
+        if '_ctypes_type' not in vars(cls):
+            from .cstruct import ctypes_type
+            cls._ctypes_type = ctypes_type(cls)
+        return vars(cls)['_ctypes_type']
+
     @classmethod
     def __prepare__(mcs, name, bases, *args, **kwargs):
         # Attributes need to be iterated in order of definition
         return OrderedDict()
 
 
+@lru_cache(maxsize=None)
+def _has_bytes_hooks(cls) -> bool:
+    hooks = collect_tags_by_hook(cls)['__bytes__']
+    return bool(hooks['precall'] or hooks['postcall'])
+
+
+class _InitArgsMethod:
+    """
+    A classmethod that, when called through an instance, is passed the arguments the instance was created with
+    (after the first argument). This way, `obj.from_bytes(data)` works for Structs with required arguments.
+    """
+
+    def __init__(self, func: Callable):
+        self.func = func
+        self.__doc__ = func.__doc__
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return types.MethodType(self.func, owner)
+
+        func, args = self.func, instance._init_args
+
+        def bound(data, **kwargs):
+            return func(owner, data, *args, **kwargs)
+
+        return bound
+
+
+def _rebuild(cls, args: tuple, data: bytes):
+    """
+    Recreate a pickled Struct from its' serialized bytes
+    """
+    return cls.from_bytes(data, *args)
+
+
+class _LazyField:
+    """
+    Placeholder for the fields of a Struct class that wasn't finalized yet, finalizes it when accessed.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        owner.finalize()
+        return getattr(owner if instance is None else instance, self.name)
+
+
 class Struct(metaclass=StructMeta):
     __frozen = False
     _field_names: List[str]
     _from_bytes_hooks = {}
+    # The arguments that were passed to __init__
+    _init_args = ()
+
+    # The object that contains this Struct (when nested or sequenced), notified when the Struct changes
+    _parent = None
+    # Incremented whenever a field changes, used to invalidate the cached bytes
+    _version = 0
+    # Cached serialization, used only if the Struct was defined with cached=True
+    _bytes_cache = None
+    _segments = None
+    # The size of the Struct, used until the Struct changes (only if the Struct was defined with cached=True)
+    _size_cache = None
+    # The names of the fields that were set in the current batch (see batch), None if there isn't one
+    _batch = None
+    # Maps names of discriminators to the names of their Switches (set when the class is finalized)
+    _discriminated = {}
 
     @property
     def value(self):
@@ -109,7 +268,13 @@ class Struct(metaclass=StructMeta):
 
     @value.setter
     def value(self, obj):
-        vars(self).update(vars(obj))
+        state = vars(self)
+        state.update(obj.__getstate__())
+        # The version was copied from obj, so the caches of this Struct might seem to be up to date
+        for key in ('_bytes_cache', '_segments', '_size_cache'):
+            state.pop(key, None)
+        self._link_fields()
+        touch(self)
 
     @classmethod
     def validate(cls, value):
@@ -135,17 +300,12 @@ class Struct(metaclass=StructMeta):
                              'Expected arguments: {} but {} given.'
                              .format(positional_args, len(args)))
 
-        # from_bytes and from_stream need the args to create the class, but shouldn't be required by default API
-        # Set the functions as a private function
-        self._from_bytes = self.from_bytes
-        self._from_stream = self.from_stream
-
-        # Encapsulate the functions so the arguments are automatically passed without changing from_bytes API
-        self.from_bytes = lambda data: self._from_bytes(data, *args)
-        self.from_stream = lambda data: self._from_stream(data, *args)
-
         self._from_bytes_hooks = {}
 
+        # Keep the arguments, so more instances of this Struct can be created (e.g. when decoding a Vector).
+        # from_bytes and from_stream need them as well, when they're called through an instance.
+        self._init_args = args
+
         # Deepcopy the fields so different instances of Struct have unique fields
         for name, field in self:
             # Validate the values
@@ -155,6 +315,10 @@ class Struct(metaclass=StructMeta):
             # Initialize VLA length fields with proper values
             if isinstance(field, VLA):
                 setattr(self, field.length_field_name, len(field))
+            # Select the case of the default value of the discriminator (if there's one)
+            elif isinstance(field, Switch):
+                with suppress(ValueError):
+                    getattr(self, name).select(getattr(self, field.discriminator_name).value)
 
         for k, v in kwargs.items():
             if k not in self._field_names:
@@ -175,7 +339,14 @@ class Struct(metaclass=StructMeta):
         return '\n'.join(x)
 
     def __len__(self) -> int:
-        return sum(field.size for field in self._fields)
+        if not self._cached:
+            return sum(field.size for field in self._fields)
+
+        if self._size_cache is not None and self._size_cache[0] == self._version:
+            return self._size_cache[1]
+        size = sum(field.size for field in self._fields)
+        self._size_cache = (self._version, size)
+        return size
 
     @property
     def size(self):
@@ -202,51 +373,243 @@ class Struct(metaclass=StructMeta):
         You may use this function instead of bytes() if you don't want the bytes hook
         be hooked.
         """
+        if memory.tracker is not None:
+            return memory.tracker.measure(type(self), 'serialize', self._serialize)
+        return self._serialize()
+
+    def _serialize(self) -> bytes:
         try:
+            if self._cached:
+                return self._serialize_cached()
             return b''.join(map(bytes, self._fields))
         except struct.error as e:
             raise ValueError(str(e)) from e
 
+    def _serialize_cached(self) -> bytes:
+        """
+        Serialize using the bytes of the previous serialization, only fields that changed since are re-encoded.
+        """
+        if self._bytes_cache is not None and self._bytes_cache[0] == self._version:
+            return self._bytes_cache[1]
+
+        # A discriminator may have been changed through its' field, so the Switches select their cases before
+        # their versions are compared
+        for names in self._discriminated.values():
+            for name in names:
+                # noinspection PyProtectedMember
+                getattr(self, name)._sync()
+
+        # Every segment is a (field, field version, field bytes) tuple
+        segments = self._segments or [None] * len(self._field_names)
+        for index, field in enumerate(self._fields):
+            segment = segments[index]
+            if segment is None or segment[0] is not field or segment[1] != field._version:
+                segments[index] = (field, field._version, bytes(field))
+
+        data = b''.join(segment[2] for segment in segments)
+        self._segments = segments
+        self._bytes_cache = (self._version, data)
+        return data
+
+    def iter_buffers(self) -> Iterator[Union[bytes, memoryview]]:
+        """
+        Serialize the Struct into buffers, whose concatenation is the serialized Struct.
+        Small fields are joined together, while large payloads (like Bytes fields) are passed as-is, without copying.
+        The buffers can be sent with a single call to socket.sendmsg (or os.writev).
+        """
+        # Bytes hooks are only invoked by bytes(), and cached Structs already have their bytes
+        if self._cached or _has_bytes_hooks(type(self)):
+            yield bytes(self)
+            return
+
+        try:
+            yield from coalesce_buffers(buffer for field in self._fields for buffer in field.iter_buffers())
+        except struct.error as e:
+            raise ValueError(str(e)) from e
+
+    def to_ctypes(self):
+        """
+        :return: An instance of the Struct's ctypes_type, with a copy of the serialized Struct
+        """
+        return type(self).ctypes_type.from_buffer_copy(self.serialize())
+
+    @_InitArgsMethod
+    def from_ctypes(cls, obj, *args):
+        """
+        Deserialize an instance of the Struct's ctypes_type into a Struct.
+
+        :param obj:     The ctypes Structure
+        :param args:    Arguments for the __init__ of the Struct, if there's any
+        """
+        return cls.from_bytes(memoryview(obj).cast('B'), *args)
+
+    def as_template(self):
+        """
+        Serialize the Struct into a Template, a bytearray whose fields can be changed in-place
+        (without serializing the Struct again).
+        """
+        from .template import Template
+        return Template(self)
+
     pre_bytes_hook = precall_register('__bytes__')
     post_bytes_hook = postcall_register('__bytes__')
 
     @classmethod
-    def from_bytes(cls, data: bytes, *args):
+    def decode_columns(cls, data: bytes, fields: Optional[Iterable[str]] = None) -> dict:
+        """
+        Decode consecutive records of this Struct into columns, without creating a Struct for every record.
+        The Struct must have a fixed size, and fields that can be described by a struct format.
+
+        :param data:    The raw data, consecutive serialized records
+        :param fields:  The names of the fields to decode (all of them by default)
+        :return:        A mapping of field names to their values in all the records.
+                        The values of scalars are in an array.array, other fields have a list of (raw) values.
+        """
+        from .columns import decode_columns
+        return decode_columns(cls, data, fields)
+
+    @classmethod
+    def encode_columns(cls, columns: dict) -> bytes:
+        """
+        Serialize columns of values into consecutive records of this Struct (the opposite of decode_columns).
+        Fields that don't have a column get their default value. Values aren't validated.
+
+        :param columns: A mapping of field names to their values in all the records
+        :return:        The serialized records
+        """
+        from .columns import encode_columns
+        return encode_columns(cls, columns)
+
+    @classmethod
+    def scan(cls, data: bytes, where: Optional[dict] = None, decode: bool = True) -> Iterator:
+        """
+        Find the records of this Struct (in consecutive serialized records) whose fields match predicates.
+        The predicates are tested on the raw bytes of the fields, only matching records are deserialized.
+        The Struct must have a fixed size.
+
+        >>> for packet in Packet.scan(capture, where={'opcode': 7, 'port': range(1000, 2000)}):
+        ...     handle(packet)
+
+        :param data:    The raw data, consecutive serialized records
+        :param where:   Maps field names to predicates, anything that can be used as a validator
+                        (e.g. a value, a set of values, a range, a function or a validator)
+        :param decode:  Whether to deserialize the matching records, or yield memoryviews of their data
+        :return:        An iterator of the matching records
+        """
+        from .scan import scan
+        return scan(cls, data, where, decode)
+
+    @classmethod
+    def projection(cls, *names: str):
+        """
+        Create a Projection, that decodes only the given fields (and skips the rest).
+        Projections are created once for every combination of fields.
+
+        :param names:   The names of the fields to decode
+        :return:        A callable that receives the raw data, and returns a namedtuple of the values of the fields
+        """
+        projections = vars(cls).get('_projections')
+        if projections is None:
+            projections = cls._projections = {}
+        if names not in projections:
+            from .projection import Projection
+            projections[names] = Projection(cls, names)
+        return projections[names]
+
+    @_InitArgsMethod
+    def from_bytes(cls, data: bytes, *args, into: Optional['Struct'] = None, fields: Optional[Iterable[str]] = None):
         """
         Deserialize raw data from bytes into a Struct.
 
-        :param data: The raw data to parse
-        :param args: Arguments for the __init__ of the Struct, if there's any
+        :param data:    The raw data to parse
+        :param args:    Arguments for the __init__ of the Struct, if there's any
+        :param into:    An existing instance to deserialize into (instead of creating a new one)
+        :param fields:  Decode only these fields, and return a namedtuple of their values (see projection)
         :return The deserialized struct
         """
+        if fields is not None:
+            if into is not None:
+                raise TypeError("'into' and 'fields' can't be used together")
+            return cls.projection(*fields)(data, *args)
 
-        obj = cls(*args)
+        if into is not None and not isinstance(into, cls):
+            raise TypeError(f'Unable to deserialize {cls.__qualname__} into {type(into).__qualname__}')
+
+        if memory.tracker is not None:
+            return memory.tracker.measure(cls, 'from_bytes', lambda: cls._deserialize(data, args, into))
+        return cls._deserialize(data, args, into)
+
+    @classmethod
+    def _deserialize(cls, data: bytes, args: tuple, into: Optional['Struct']):
+        obj = cls(*args) if into is None else into
+        obj.decode(data)
+        return obj
+
+    def update_from_bytes(self, data: bytes):
+        """
+        Deserialize raw data into this Struct (in-place), the existing fields are reused.
+        Struct elements of Vectors and Arrays are reused as well, if there are enough of them.
+
+        :param data: The raw data to parse
+        :return: The Struct itself
+        """
+        self.decode(data)
+        return self
 
-        for field_name in obj._field_names:
+    def decode(self, data: bytes, offset: int = 0) -> int:
+        """
+        Deserialize raw data into the fields of this Struct (in-place).
+
+        :param data:    The raw data to parse
+        :param offset:  The position in data where the Struct starts
+        :return:        The number of bytes consumed
+        """
+        start = offset
+
+        for field_name in self._field_names:
 
             # Get field for current field name
-            field = getattr(obj, field_name)
+            field = getattr(self, field_name)
 
-            obj.invoke_from_bytes_hooks(field)
+            self.invoke_from_bytes_hooks(field)
 
             # Bytes hooks can change the field object, so get it again by name
-            field = getattr(obj, field_name)
+            field = getattr(self, field_name)
 
             if isinstance(field, VLA):
-                field.length = int(getattr(obj, field.length_field_name))
-                field.from_bytes(data)
-                data = data[len(bytes(field)):]
+                field.length = int(getattr(self, field.length_field_name))
+                offset += field.decode(data, offset)
+            elif isinstance(field, Switch):
+                field.select(getattr(self, field.discriminator_name).value)
+                offset += field.decode(data, offset)
             else:
-                split_index = field.size
-
-                field_data, data = data[:split_index], data[split_index:]
-                field.value = field.from_bytes(field_data).value
+                offset += field.decode(data, offset)
                 with suppress(AttributeError):
                     field.validator.validate(field.value)
 
-        return obj
+        return offset - start
 
-    @classmethod
+    def _decode_steps(self) -> Generator[int, bytes, None]:
+        """
+        Deserialize the Struct in-place, incrementally (see Field._decode_steps).
+        """
+        for field_name in self._field_names:
+            field = getattr(self, field_name)
+            self.invoke_from_bytes_hooks(field)
+            field = getattr(self, field_name)
+
+            if isinstance(field, VLA):
+                field.length = int(getattr(self, field.length_field_name))
+                yield from field._decode_steps()
+            elif isinstance(field, Switch):
+                field.select(getattr(self, field.discriminator_name).value)
+                yield from field._decode_steps()
+            else:
+                yield from field._decode_steps()
+                with suppress(AttributeError):
+                    field.validator.validate(field.value)
+
+    @_InitArgsMethod
     def from_stream(cls, read_func: Callable[[int], bytes], *args):
         """
         Deserialize a Struct object from a stream.
@@ -269,6 +632,8 @@ class Struct(metaclass=StructMeta):
                 data = read_func(field.length)
                 field.from_bytes(data)
             else:
+                if isinstance(field, Switch):
+                    field.select(getattr(obj, field.discriminator_name).value)
                 read_size = field.size
 
                 data = read_func(read_size)
@@ -292,15 +657,29 @@ class Struct(metaclass=StructMeta):
         :param value:   The value to set
         :return:        None
         """
-        if key in self._field_names and not isinstance(value, (Field, StructMeta, Struct)):
+        switch = vars(self).get(key)
+        if isinstance(switch, Switch) and not isinstance(value, Switch):
+            # Assigning a case selects it, and sets the discriminator to its' key
+            switch.value = value
+        elif key in self._field_names and not isinstance(value, (Field, StructMeta, Struct)):
             field = getattr(self, key)
-            with suppress(AttributeError):
-                field.validator.validate(value)
-            field.value = value
-            # Check if the field is a VLA
-            if isinstance(field, VLA):
-                # Set VLA source to the new length
-                setattr(self, field.length_field_name, len(field))
+            # Validation and VLA length updates are done when the batch ends
+            if self._batch is not None:
+                field.value = value
+                self._batch.add(key)
+            else:
+                with suppress(AttributeError):
+                    field.validator.validate(value)
+                field.value = value
+                # Check if the field is a VLA
+                if isinstance(field, VLA):
+                    # Set VLA source to the new length
+                    setattr(self, field.length_field_name, len(field))
+            # Select the cases of the Switches of this discriminator
+            for name in self._discriminated.get(key, ()):
+                # The Switches are selected in __init__ once they're copied
+                if name in vars(self):
+                    getattr(self, name).select(field.value)
         # Overriding fields but saving the hooks
         elif key in self._field_names:
             # Save the hooks from the field
@@ -309,11 +688,103 @@ class Struct(metaclass=StructMeta):
             super().__setattr__(key, value)
             # Inject the old hooks to the new field
             setattr(getattr(self, key), '_from_bytes_hooks', hooks)
+            # Link the new field to this Struct, so changes to the field are tracked
+            if isinstance(value, (Field, Struct)):
+                object.__setattr__(value, '_parent', self)
+            touch(self)
+            # Select the cases of the Switches of this discriminator (they're selected in __init__ once they're copied)
+            for name in self._discriminated.get(key, ()):
+                if name in vars(self):
+                    getattr(self, name).select(getattr(self, key).value)
         elif hasattr(self, key) or not self.__frozen:
             super().__setattr__(key, value)
         else:
             raise AttributeError("Struct doesn't allow defining new attributes")
 
+    @contextmanager
+    def batch(self):
+        """
+        Set many fields without validating them, or updating the lengths of VLAs, after every change.
+        The fields that were set are validated (and the lengths of VLAs are updated) once, when the batch ends.
+        Nested Structs are batched as well. Scalars still check their values when they're set.
+
+        >>> with packet.batch():
+        ...     packet.opcode = 3
+        ...     packet.payload = data
+        """
+        if self._batch is not None:
+            yield self
+            return
+
+        with ExitStack() as nested:
+            for field in self._fields:
+                if isinstance(field, Struct):
+                    nested.enter_context(field.batch())
+
+            self._batch = set()
+            try:
+                yield self
+            finally:
+                changed, self._batch = self._batch, None
+                for name in self._field_names:
+                    field = getattr(self, name)
+                    if name in changed and isinstance(field, VLA):
+                        setattr(self, field.length_field_name, len(field))
+
+            for name in self._field_names:
+                if name in changed:
+                    field = getattr(self, name)
+                    with suppress(AttributeError):
+                        field.validator.validate(field.value)
+
+    def _layout_info(self):
+        layout = StructLayout(self)
+        return layout.size, layout.format
+
+    def _link_fields(self):
+        """
+        Set this Struct as the parent of its' fields, so their changes are tracked
+        """
+        for field in self._fields:
+            if isinstance(field, (Field, Struct)):
+                object.__setattr__(field, '_parent', self)
+
+    def __getstate__(self):
+        state = vars(self).copy()
+        # The parent and caches are specific to this object, so they aren't copied
+        for key in ('_parent', '_bytes_cache', '_segments', '_size_cache', '_batch'):
+            state.pop(key, None)
+        return state
+
+    def __setstate__(self, state):
+        vars(self).update(state)
+        self._link_fields()
+
+    def __reduce_ex__(self, protocol):
+        """
+        Structs are pickled in their serialized form (with the arguments they were created with),
+        and are deserialized when unpickled.
+        Structs that can't be serialized (e.g. with placeholders) are pickled with all of their fields.
+        """
+        try:
+            data = self.serialize()
+        except (ValueError, AttributeError):
+            return super().__reduce_ex__(protocol)
+        return _rebuild, (type(self), self._init_args, data)
+
+    def __copy__(self):
+        # The fields are shared with this Struct, and still belong to it (so they aren't linked to the copy)
+        obj = object.__new__(type(self))
+        vars(obj).update(self.__getstate__())
+        return obj
+
+    def __deepcopy__(self, memo):
+        # Copies are made field by field, not by serializing (unlike pickling)
+        obj = object.__new__(type(self))
+        memo[id(self)] = obj
+        obj.__setstate__(copy.deepcopy(self.__getstate__(), memo))
+        return obj
+
     def invoke_from_bytes_hooks(self, field: Field):
         for f in getattr(field, '_from_bytes_hooks', ()):
             f(self)
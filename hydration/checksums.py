@@ -0,0 +1,64 @@
+import struct
+import zlib
+from typing import Callable, Any, Iterable, Union
+
+
+class Checksum:
+    """
+    A checksum algorithm, that's computed incrementally over chunks of data:
+    the state starts as `initial`, is updated with every chunk, and `finish` returns the checksum of the final state.
+    """
+
+    def __init__(self, update: Callable[[Any, bytes], Any], initial: Any = 0, finish: Callable[[Any], int] = None):
+        """
+        :param update:  Receives the current state and the next chunk of data, returns the new state
+        :param initial: The state before any data
+        :param finish:  Receives the final state, returns the checksum (the state itself by default)
+        """
+        self.update = update
+        self.initial = initial
+        self.finish = finish or (lambda state: state)
+
+    def compute(self, chunks: Iterable[bytes]) -> int:
+        """
+        :return: The checksum of the concatenation of the chunks
+        """
+        state = self.initial
+        for chunk in chunks:
+            state = self.update(state, chunk)
+        return self.finish(state)
+
+
+def as_checksum(algorithm: Union[Checksum, Callable[[bytes], int]]) -> Checksum:
+    """
+    :param algorithm:   A Checksum, or a function that receives all the data and returns its' checksum
+    """
+    if isinstance(algorithm, Checksum):
+        return algorithm
+    elif callable(algorithm):
+        return Checksum(lambda chunks, chunk: chunks + (bytes(chunk),), (), lambda chunks: algorithm(b''.join(chunks)))
+    raise TypeError(f'Invalid checksum algorithm: {algorithm}')
+
+
+def _internet_update(state, data: bytes):
+    total, leftover = state
+    data = leftover + bytes(data)
+    words = len(data) // 2
+    total += sum(struct.unpack_from('>{}H'.format(words), data))
+    return total, data[words * 2:]
+
+
+def _internet_finish(state) -> int:
+    total, leftover = state
+    if leftover:
+        # Odd lengths are padded with a zero byte
+        total += leftover[0] << 8
+    while total >> 16:
+        total = (total & 0xFFFF) + (total >> 16)
+    return ~total & 0xFFFF
+
+
+CRC32 = Checksum(lambda state, data: zlib.crc32(data, state), 0)
+ADLER32 = Checksum(lambda state, data: zlib.adler32(data, state), 1)
+# The ones' complement checksum of IP, TCP and UDP (RFC 1071)
+INTERNET = Checksum(_internet_update, (0, b''), _internet_finish)
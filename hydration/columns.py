@@ -0,0 +1,159 @@
+import array
+import struct
+import sys
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple, Union, Sequence, Any
+
+from .layout import StructLayout, FieldLayout, check_fixed_size, record_format
+
+Column = Union[array.array, list]
+
+# The byte orders of struct formats, as sys.byteorder names them
+_byte_orders = {'<': 'little', '>': 'big', '=': sys.byteorder}
+
+
+def _array_typecodes() -> Dict[str, str]:
+    """
+    :return: A mapping of scalar format characters to array typecodes of the same size
+    """
+    typecodes = {}
+    for kind in ('BHILQ', 'bhilq', 'fd'):
+        for code in kind:
+            size = struct.calcsize('=' + code)
+            # The typecodes of the array module have native sizes, so find the one with the same size
+            for typecode in kind:
+                if array.array(typecode).itemsize == size:
+                    typecodes.setdefault(code, typecode)
+                    break
+    return typecodes
+
+
+_typecodes = _array_typecodes()
+
+
+@lru_cache(maxsize=None)
+def _value_count(fmt: str) -> int:
+    """
+    :return: The number of values that are packed or unpacked by the format
+    """
+    return len(struct.unpack(fmt, bytes(struct.calcsize(fmt))))
+
+
+def _field_layouts(layout: StructLayout, fields: Optional[Iterable[str]]) -> Tuple[FieldLayout, ...]:
+    if fields is None:
+        return layout.fields
+    try:
+        return tuple(layout[name] for name in dict.fromkeys(fields))
+    except KeyError as e:
+        raise AttributeError(f'No field named {e.args[0]}') from None
+
+
+def _scalar_column(view: memoryview, stride: int, field_layout: FieldLayout) -> array.array:
+    """
+    :return: The values of a scalar field in all the records, its' bytes are gathered with strided slices
+             (instead of unpacking every record)
+    """
+    size = field_layout.size
+    data = bytearray(len(view) // stride * size)
+    for index in range(size):
+        data[index::size] = view[field_layout.offset + index::stride]
+
+    column = array.array(_typecodes[field_layout.format[1]])
+    column.frombytes(data)
+    if size > 1 and _byte_orders[field_layout.format[0]] != sys.byteorder:
+        column.byteswap()
+    return column
+
+
+def decode_columns(struct_class, data, fields: Optional[Iterable[str]] = None) -> Dict[str, Column]:
+    """
+    Decode consecutive records of a Struct (with a fixed size) into columns, without creating the Structs.
+    See Struct.decode_columns.
+    """
+    layout = struct_class.layout
+    check_fixed_size(layout, struct_class.__qualname__)
+    field_layouts = _field_layouts(layout, fields)
+
+    if any(f.format is None for f in field_layouts):
+        raise TypeError(f"The fields of {struct_class.__qualname__} can't be decoded into columns")
+    # Fields with several values (like Arrays) or non-numeric values are unpacked together, record by record
+    others = tuple(sorted((f for f in field_layouts if not f.is_scalar), key=lambda f: f.offset))
+    fmt = record_format(layout, tuple(f.name for f in others)) if others else None
+    if others and fmt is None:
+        raise TypeError(f"The fields of {struct_class.__qualname__} can't be decoded into columns")
+
+    view = memoryview(data).cast('B')
+    if len(view) % layout.size:
+        raise ValueError(f'Data length ({len(view)}) is not a multiple of the size '
+                         f'of {struct_class.__qualname__} ({layout.size})')
+
+    columns = {}
+    for field_layout in field_layouts:
+        if field_layout.is_scalar:
+            columns[field_layout.name] = _scalar_column(view, layout.size, field_layout)
+
+    if others:
+        lists = [[] for _ in others]
+        counts = [_value_count(f.format) for f in others]
+        for values in struct.iter_unpack(fmt, view):
+            position = 0
+            for column, count in zip(lists, counts):
+                # Fields with several values have a tuple of values for every record
+                column.append(values[position] if count == 1 else values[position:position + count])
+                position += count
+        columns.update((f.name, column) for f, column in zip(others, lists))
+
+    # Keep the requested order of fields
+    return {f.name: columns[f.name] for f in field_layouts}
+
+
+def encode_columns(struct_class, columns: Dict[str, Sequence[Any]]) -> bytes:
+    """
+    Serialize columns of values into consecutive records of a Struct (with a fixed size).
+    See Struct.encode_columns.
+    """
+    layout = struct_class.layout
+    check_fixed_size(layout, struct_class.__qualname__)
+    if layout.format is None:
+        raise TypeError(f"The fields of {struct_class.__qualname__} can't be encoded from columns")
+
+    for name in columns:
+        if name not in layout.by_name:
+            raise AttributeError(f'No field named {name}')
+
+    lengths = {len(column) for column in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError('All the columns must have the same length')
+    count = lengths.pop() if lengths else 0
+
+    # Every field is either a column, or the default value of the field (the same for every record)
+    parts = []
+    for field_layout in layout:
+        single = _value_count(field_layout.format) == 1
+        if field_layout.name in columns:
+            parts.append((True, single, columns[field_layout.name]))
+        else:
+            try:
+                default = struct.unpack(field_layout.format, bytes(field_layout.field))
+            except ValueError as e:
+                raise ValueError(f"No column was given for '{field_layout.name}', "
+                                 f"and its' default value can't be serialized") from e
+            parts.append((False, single, default))
+
+    record = struct.Struct(layout.format)
+    result = bytearray(record.size * count)
+    try:
+        for index in range(count):
+            row = []
+            for is_column, single, values in parts:
+                if not is_column:
+                    row.extend(values)
+                elif single:
+                    row.append(values[index])
+                else:
+                    row.extend(values[index])
+            record.pack_into(result, index * record.size, *row)
+    except struct.error as e:
+        raise ValueError(str(e)) from e
+
+    return bytes(result)
@@ -0,0 +1,65 @@
+import ctypes
+
+from .addresses import _IPAddress
+from .base import Struct
+from .message import MetaField
+from .scalars import Scalar, Enum
+from .vectors import Array, Bytes
+
+_ctypes_scalars = {
+    'B': ctypes.c_uint8,
+    'H': ctypes.c_uint16,
+    'I': ctypes.c_uint32,
+    'Q': ctypes.c_uint64,
+    'b': ctypes.c_int8,
+    'h': ctypes.c_int16,
+    'i': ctypes.c_int32,
+    'q': ctypes.c_int64,
+    'f': ctypes.c_float,
+    'd': ctypes.c_double,
+}
+
+# ctypes Structure bases by the byte order character of the layout format
+_structure_bases = {
+    '<': ctypes.LittleEndianStructure,
+    '>': ctypes.BigEndianStructure,
+    '=': ctypes.Structure,
+}
+
+
+def _field_ctype(field, name: str):
+    """
+    :return: The ctypes type that's equivalent to a field
+    """
+    if isinstance(field, MetaField):
+        return _field_ctype(field.data_field, name)
+    elif isinstance(field, Enum):
+        return _field_ctype(field.type, name)
+    elif isinstance(field, Scalar):
+        return _ctypes_scalars[field.scalar_format]
+    elif isinstance(field, Struct):
+        return type(field).ctypes_type
+    elif isinstance(field, Array):
+        return _field_ctype(field.type, name) * len(field)
+    elif isinstance(field, (Bytes, _IPAddress)):
+        return ctypes.c_uint8 * len(field)
+    raise TypeError(f"Field '{name}' ({type(field).__qualname__}) has no equivalent ctypes type")
+
+
+def ctypes_type(struct_class) -> type:
+    """
+    Create a ctypes Structure with the same layout as a Struct (see StructMeta.ctypes_type)
+    """
+    layout = struct_class.layout
+    if layout.size is None or layout.format is None:
+        raise TypeError(f'{struct_class.__qualname__} must have a fixed size, '
+                        f'and all of its fields must have the same byte order')
+
+    fields = [(f.name, _field_ctype(f.field, f.name)) for f in layout]
+    structure = type(struct_class.__name__, (_structure_bases[layout.format[0]],),
+                     {'_pack_': 1, '_fields_': fields, '__qualname__': struct_class.__qualname__})
+
+    if ctypes.sizeof(structure) != layout.size:
+        raise TypeError(f'The size of the ctypes Structure of {struct_class.__qualname__} '
+                        f'({ctypes.sizeof(structure)}) is different from its size ({layout.size})')
+    return structure
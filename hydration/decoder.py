@@ -0,0 +1,233 @@
+import struct
+from typing import Type, Optional, Mapping, Any, List, Union
+
+from .base import Struct
+from .message import Message, OpcodeField, InclusiveLengthField, ExclusiveLengthField
+
+
+class Decoder:
+    """
+    An incremental (sans-IO) decoder, that deserializes Structs from data as it arrives,
+    in chunks of any size (e.g. from a non-blocking socket):
+
+    >>> decoder = Decoder(Header)
+    >>> for obj in decoder.feed(sock.recv(4096)):
+    ...     handle(obj)
+
+    Decoding continues from where the previous chunk ended (even in the middle of a field or a Vector),
+    so nothing is parsed twice. Only the bytes of the current field are buffered.
+
+    If the root Struct has an OpcodeField, the Struct that follows it is decoded as well, according to its'
+    opcode dictionary (or the given dispatch table), and a Message of both of them is returned.
+    """
+
+    def __init__(self, root: Type[Struct], dispatch: Optional[Mapping[Any, Type[Struct]]] = None):
+        """
+        :param root:        The Struct to decode (the header, when dispatching)
+        :param dispatch:    Maps the values of the root's OpcodeField to the Struct that follows the root.
+                            Defaults to the reversed opcode dictionary of the OpcodeField, if there is one.
+        """
+        if not root._field_names:
+            raise ValueError(f'{root.__qualname__} has no fields to decode')
+        self.root = root
+        self.opcode_name = None
+        for name, field in root():
+            if isinstance(field, OpcodeField):
+                self.opcode_name = name
+                if dispatch is None:
+                    dispatch = {opcode: struct for struct, opcode in field.opcode_dictionary.items()}
+                break
+        else:
+            if dispatch is not None:
+                raise ValueError(f'{root.__qualname__} has no OpcodeField to dispatch by')
+        self.dispatch = dispatch
+
+        # The generator of the object that's currently decoded, and the number of bytes it needs
+        self._steps = None
+        self._needed = 0
+        self._pending = bytearray()
+
+    @property
+    def buffered(self) -> int:
+        """
+        :return: The number of bytes that were fed, but not decoded yet
+        """
+        return len(self._pending)
+
+    def reset(self):
+        """
+        Drop the partially decoded object (and its' buffered data)
+        """
+        self._steps = None
+        self._needed = 0
+        self._pending = bytearray()
+
+    def feed(self, data: Union[bytes, bytearray, memoryview]) -> List[Union[Struct, Message]]:
+        """
+        Decode the next chunk of data.
+
+        :param data:    The data that arrived
+        :return:        The objects that were completed by this chunk (might be empty)
+        :raises:        ValueError if the data is invalid, the decoder is reset in that case
+        """
+        results = []
+        view = memoryview(data).cast('B')
+
+        while view or (self._steps is not None and self._needed == 0):
+            if self._steps is None:
+                # Start decoding the next object, there's nothing to send until it requests data
+                self._steps = self._decode_steps()
+                chunk = None
+            else:
+                missing = self._needed - len(self._pending)
+                if len(view) < missing:
+                    self._pending += view
+                    break
+
+                # The bytes are copied, since decoded Bytes fields keep references to them
+                if self._pending:
+                    self._pending += view[:missing]
+                    chunk = bytes(self._pending)
+                    self._pending = bytearray()
+                else:
+                    chunk = bytes(view[:missing])
+                view = view[missing:]
+
+            result = self._send(chunk)
+            if result is not None:
+                results.append(result)
+
+        return results
+
+    def _send(self, chunk: bytes):
+        try:
+            self._needed = self._steps.send(chunk)
+        except StopIteration as e:
+            self._steps = None
+            self._needed = 0
+            return e.value
+        except Exception:
+            self.reset()
+            raise
+        return None
+
+    def _decode_steps(self):
+        obj = self.root()
+        yield from obj._decode_steps()
+        if self.opcode_name is None:
+            return obj
+
+        opcode = getattr(obj, self.opcode_name).value
+        try:
+            next_struct = self.dispatch[opcode]
+        except KeyError:
+            raise ValueError(f'Unknown opcode for {self.root.__qualname__}: {opcode}') from None
+
+        next_obj = next_struct()
+        yield from next_obj._decode_steps()
+        return Message(obj, next_obj, update_metadata=False)
+
+
+class FrameSplitter:
+    """
+    Splits a stream of length-prefixed frames, without deserializing them:
+
+    >>> splitter = FrameSplitter(Header)
+    >>> for frame in splitter.feed(sock.recv(4096)):
+    ...     forward(frame)
+
+    The header must have an InclusiveLengthField or an ExclusiveLengthField with a static offset,
+    only that field is decoded. Frames are memoryviews of the fed data (they aren't copied),
+    except for frames that span several chunks, which are accumulated in a bytearray (every byte is copied once).
+    """
+
+    def __init__(self, header: Type[Struct], max_size: Optional[int] = None):
+        """
+        :param header:      The Struct every frame starts with
+        :param max_size:    The maximal size of a frame, larger frames are invalid
+        """
+        layout = header.layout
+        if layout.size is None:
+            raise ValueError(f'The size of {header.__qualname__} must be static')
+
+        for field_layout in layout:
+            if isinstance(field_layout.field, (InclusiveLengthField, ExclusiveLengthField)):
+                break
+        else:
+            raise ValueError(f'{header.__qualname__} has no length field')
+        if not field_layout.is_scalar:
+            raise ValueError(f"The length field of {header.__qualname__} ('{field_layout.name}') "
+                             f"must be a scalar with a static offset")
+
+        self.header = header
+        self.max_size = max_size
+        self._length_format = struct.Struct(field_layout.format)
+        self._length_offset = field_layout.offset
+        self._header_size = layout.size
+        # Exclusive lengths don't include the header
+        self._length_base = 0 if isinstance(field_layout.field, InclusiveLengthField) else layout.size
+        self._pending = bytearray()
+
+    @property
+    def buffered(self) -> int:
+        """
+        :return: The number of bytes of the incomplete frame
+        """
+        return len(self._pending)
+
+    def reset(self):
+        """
+        Drop the incomplete frame
+        """
+        self._pending = bytearray()
+
+    def _frame_size(self, data, position: int) -> int:
+        size = self._length_base + self._length_format.unpack_from(data, position + self._length_offset)[0]
+        if size < self._header_size or (self.max_size is not None and size > self.max_size):
+            self.reset()
+            raise ValueError(f'Invalid frame size: {size}')
+        return size
+
+    def _fill(self, view: memoryview, position: int, size: int) -> int:
+        """
+        Add data to the incomplete frame, until it has size bytes (or the data ends)
+
+        :return: The position after the data that was added
+        """
+        end = position + max(0, size - len(self._pending))
+        self._pending += view[position:end]
+        return min(end, len(view))
+
+    def feed(self, data: Union[bytes, bytearray, memoryview]) -> List[memoryview]:
+        """
+        Split the next chunk of data.
+
+        :param data:    The data that arrived
+        :return:        The frames that were completed by this chunk (might be empty)
+        :raises:        ValueError if the length of a frame is invalid, the splitter is reset in that case
+        """
+        view = memoryview(data).cast('B')
+        frames = []
+        position = 0
+
+        if self._pending:
+            # Complete the header of the incomplete frame, and then the frame itself
+            position = self._fill(view, position, self._header_size)
+            if len(self._pending) >= self._header_size:
+                size = self._frame_size(self._pending, 0)
+                position = self._fill(view, position, size)
+                if len(self._pending) == size:
+                    frames.append(memoryview(self._pending))
+                    self._pending = bytearray()
+            if self._pending:
+                return frames
+
+        while len(view) - position >= self._header_size:
+            size = self._frame_size(view, position)
+            if len(view) - position < size:
+                break
+            frames.append(view[position:position + size])
+            position += size
+
+        self._pending += view[position:]
+        return frames
@@ -1,11 +1,19 @@
 import abc
+import copy
+import struct
 from abc import ABC
-from typing import Union
+from contextlib import suppress
+from typing import Union, Tuple, Optional, Iterator, Generator, Mapping, Any
 
+from .helpers import as_obj, touch
 from .validators import ValidatorABC
 
 
 class Field(ABC):
+    # The object (Struct or sequence) that contains this field, notified when the field changes
+    _parent = None
+    # Incremented whenever the value of the field changes, used to invalidate cached data
+    _version = 0
 
     @property
     @abc.abstractmethod
@@ -51,6 +59,38 @@ class Field(ABC):
     def from_bytes(self, data: bytes):
         raise NotImplementedError
 
+    def decode(self, data: bytes, offset: int = 0) -> int:
+        """
+        Deserialize the field in-place from data, starting at offset.
+
+        :param data:    The raw data to parse
+        :param offset:  The position in data where the field starts
+        :return:        The number of bytes consumed
+        """
+        size = self.size
+        self.from_bytes(data[offset:offset + size])
+        return size
+
+    def _decode_steps(self) -> Generator[int, bytes, None]:
+        """
+        Deserialize the field in-place, incrementally (used by Decoder).
+        The generator yields the number of bytes it needs next, and must be sent exactly that many bytes.
+        """
+        data = yield self.size
+        self.decode(data)
+
+    def iter_buffers(self) -> Iterator[Union[bytes, memoryview]]:
+        """
+        :return: Buffers whose concatenation is the serialized field (see Struct.iter_buffers)
+        """
+        yield bytes(self)
+
+    def _layout_info(self) -> Tuple[Optional[int], Optional[str]]:
+        """
+        :return: (size, struct format) of the field, each is None if it isn't static (doesn't depend on the value)
+        """
+        return None, None
+
     def __eq__(self, other):
         if isinstance(other, Field):
             return self.value == other.value and len(self) == len(other)
@@ -60,6 +100,15 @@ class Field(ABC):
     def __ne__(self, other):
         return not self == other
 
+    def __getstate__(self):
+        state = vars(self).copy()
+        # The parent is specific to this object, so it isn't copied
+        state.pop('_parent', None)
+        return state
+
+    def __setstate__(self, state):
+        vars(self).update(state)
+
 
 class VLA(Field, ABC):
     """
@@ -118,3 +167,251 @@ class FieldPlaceholder(Field):
 
     def from_bytes(self, data: bytes):
         raise AttributeError('Placeholders cannot be deserialized')
+
+
+class Switch(Field):
+    """
+    A field whose type is chosen by the value of another field of the Struct (the discriminator), like a tagged union.
+    The case is selected when the Struct is decoded, by a single lookup of the discriminator's value.
+    Assigning an instance of one of the cases selects it, and sets the discriminator.
+    Changing the discriminator (in any way) selects its' case, so the two always match.
+
+    The layout of every case is computed once (and shared by all the copies of the Switch), cases whose fields are all
+    scalars are decoded with a single unpack. Every Switch keeps the field of each case it selected, so selecting
+    a case again reuses its' field (with its' previous values).
+
+    >>> class Packet(Struct):
+    ...     kind = UInt8()
+    ...     body = Switch(kind, {1: Login, 2: Logout}, default=Bytes)
+    >>> Packet(body=Logout()).kind
+    UInt8(2)
+    """
+
+    @property
+    def validator(self):
+        return None
+
+    def __init__(self, discriminator: Union[Field, str], cases: Mapping[Any, Any], default: Any = None):
+        """
+        :param discriminator:   The field (from the struct or its' name) that selects the case
+        :param cases:           Maps values of the discriminator to the fields (or Structs) of the cases
+        :param default:         The field of values of the discriminator that aren't in cases, if there is one
+        """
+        if isinstance(discriminator, str):
+            self.discriminator_name = discriminator
+        else:
+            self.discriminator_name = None
+            self.discriminator_obj = discriminator
+
+        # The cases are templates, every Switch copies the cases it selects
+        self.cases = {key: as_obj(case) for key, case in cases.items()}
+        self.default = None if default is None else as_obj(default)
+
+        # Maps types of cases to their keys, to set the discriminator when a case is assigned (if the type is unique)
+        keys = {}
+        for key, case in self.cases.items():
+            keys[type(case)] = key if type(case) not in keys else None
+        self._keys = {case_type: key for case_type, key in keys.items() if key is not None}
+
+        # Maps ids of cases to their (size, format, codec), computed when a case is first used (see _compile)
+        self._compiled = {}
+        # Maps ids of cases to the fields this Switch created for them
+        self._case_fields = {}
+
+        # The selected key, case template and field
+        self._key = None
+        self._case = None
+        self._field = None
+
+    def find_and_set_field_name(self, attributes):
+        for attr_name, attr in attributes.items():
+            if attr is self.discriminator_obj:
+                self.discriminator_name = attr_name
+                return
+        else:
+            raise RuntimeError('Unable to find field {} for Switch {}'.format(self.discriminator_obj, self))
+
+    @property
+    def key(self):
+        """
+        :return: The value of the discriminator the selected case was selected by
+        """
+        self._sync()
+        return self._key
+
+    @property
+    def field(self):
+        """
+        :return: The field of the selected case (None if no case was selected)
+        """
+        self._sync()
+        return self._field
+
+    def select(self, key) -> None:
+        """
+        Select the case of a value of the discriminator, the current field is kept if the case doesn't change.
+        """
+        case = self.cases.get(key, self.default)
+        if case is None:
+            raise ValueError('No case of {} for {!r}'.format(self.__class__.__qualname__, key))
+        self._key = key
+        if case is not self._case:
+            field = self._case_fields.get(id(case))
+            self._set_field(case, copy.deepcopy(case) if field is None else field)
+
+    def _sync(self):
+        """
+        Select the case of the current value of the discriminator, which may have been changed through its' field
+        (e.g. `packet.kind.value = 2`), or replaced.
+        """
+        parent = self._parent
+        discriminator = None if parent is None else vars(parent).get(self.discriminator_name)
+        if discriminator is None or discriminator.value == self._key:
+            return
+
+        key = discriminator.value
+        if key in self.cases or self.default is not None:
+            self.select(key)
+        else:
+            # Nothing is selected until the discriminator has a case
+            self._key, self._case, self._field = key, None, None
+            touch(self)
+
+    def _set_field(self, case, field):
+        self._case = case
+        self._field = field
+        self._case_fields[id(case)] = field
+        object.__setattr__(field, '_parent', self)
+        touch(self)
+
+    def _compile(self, case) -> Tuple[Optional[int], Optional[str], Optional[struct.Struct]]:
+        """
+        :return: The size and format of a case (see _layout_info), and a struct.Struct that decodes all of its' fields
+                 (only for Structs whose fields are all scalars, None otherwise)
+        """
+        compiled = self._compiled.get(id(case))
+        if compiled is None:
+            # noinspection PyProtectedMember
+            size, fmt = case._layout_info()
+            layout = getattr(type(case), 'layout', None)
+            codec = None
+            if fmt is not None and layout is not None and all(f.is_scalar for f in layout) \
+                    and not any(getattr(f.field, '_from_bytes_hooks', None) for f in layout):
+                codec = struct.Struct(fmt)
+            compiled = self._compiled[id(case)] = (size, fmt, codec)
+        return compiled
+
+    def _selected(self):
+        field = self.field
+        if field is None:
+            raise ValueError('No case of {} was selected'.format(self.__class__.__qualname__))
+        return field
+
+    @property
+    def value(self):
+        field = self.field
+        return None if field is None else field.value
+
+    @value.setter
+    def value(self, value):
+        key = self._keys.get(type(value))
+        if key is not None:
+            self._key = key
+            self._set_field(self.cases[key], value)
+            # Keep the discriminator of the Struct in sync
+            parent = self._parent
+            if parent is not None and self.discriminator_name in getattr(parent, '_field_names', ()):
+                setattr(parent, self.discriminator_name, key)
+        elif self.default is not None and type(value) is type(self.default):
+            if self.key in self.cases:
+                raise ValueError('The discriminator ({}) selects a case, set it to a value without a case '
+                                 'before assigning the default'.format(self.key))
+            self._set_field(self.default, value)
+        else:
+            self._selected().value = value
+
+    def __getattr__(self, name):
+        # The public attributes of the selected case (e.g. the fields of a Struct) are accessed through the Switch
+        if name.startswith('_') or vars(self).get('_field') is None:
+            raise AttributeError(name)
+        return getattr(self.field, name)
+
+    def __setattr__(self, name, value):
+        if vars(self).get('_field') is not None and not name.startswith('_') and name not in vars(self) \
+                and not hasattr(type(self), name) and hasattr(self.field, name):
+            setattr(self.field, name, value)
+        else:
+            super().__setattr__(name, value)
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        # The codecs can't be pickled, they're compiled again when needed
+        state['_compiled'] = {}
+        return state
+
+    def __deepcopy__(self, memo):
+        # The cases (and their layouts) are shared between copies, only the selected field is copied
+        switch = object.__new__(type(self))
+        vars(switch).update(vars(self))
+        switch.__dict__.pop('_parent', None)
+        memo[id(self)] = switch
+        switch._case_fields = {}
+        if self._field is not None:
+            switch._set_field(self._case, copy.deepcopy(self._field, memo))
+        return switch
+
+    def __repr__(self) -> str:
+        return '{}({}, {!r})'.format(self.__class__.__qualname__, self.discriminator_name, self.field)
+
+    def __str__(self) -> str:
+        return str(self.field)
+
+    def __len__(self) -> int:
+        field = self.field
+        return 0 if field is None else len(field)
+
+    def __bytes__(self) -> bytes:
+        return bytes(self._selected())
+
+    def iter_buffers(self) -> Iterator[Union[bytes, memoryview]]:
+        return self._selected().iter_buffers()
+
+    def from_bytes(self, data: bytes):
+        self.decode(data)
+        return self
+
+    def decode(self, data: bytes, offset: int = 0) -> int:
+        field = self._selected()
+        codec = self._compile(self._case)[2]
+        if codec is not None:
+            try:
+                values = codec.unpack_from(data, offset)
+            except struct.error as e:
+                raise ValueError(f'Error unpacking {type(field).__qualname__} at offset {offset}: {str(e)}') from e
+            # noinspection PyProtectedMember
+            for item, value in zip(field._fields, values):
+                item.value = value
+            return codec.size
+
+        consumed = field.decode(data, offset)
+        with suppress(AttributeError):
+            field.validator.validate(field.value)
+        return consumed
+
+    def _decode_steps(self) -> Generator[int, bytes, None]:
+        field = self._selected()
+        codec = self._compile(self._case)[2]
+        if codec is not None:
+            data = yield codec.size
+            self.decode(data)
+            return
+
+        yield from field._decode_steps()
+        with suppress(AttributeError):
+            field.validator.validate(field.value)
+
+    def _layout_info(self) -> Tuple[Optional[int], Optional[str]]:
+        # The size (or format) of the Switch is static only if it's the same in all the cases
+        cases = list(self.cases.values()) + ([self.default] if self.default is not None else [])
+        sizes, formats = zip(*(self._compile(case)[:2] for case in cases))
+        return (sizes[0] if len(set(sizes)) == 1 else None), (formats[0] if len(set(formats)) == 1 else None)
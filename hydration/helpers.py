@@ -1,4 +1,9 @@
 import inspect
+from functools import lru_cache
+from typing import Iterable, Iterator, Union
+
+# Buffers smaller than this are joined with their neighbours by coalesce_buffers, larger ones are passed as-is
+BUFFER_COPY_THRESHOLD = 1024
 
 
 def as_type(obj):
@@ -13,10 +18,52 @@ def assert_no_property_override(obj, base_class):
     """
     Use this to ensure that a Struct doesn't override properties of Field when using it as one.
     Structs can be used like fields when nesting structs or sequencing them.
+    :param obj: The Struct (or its' class)
     :raises: NameError if a property was overridden.
     """
-    for attr_name in dir(obj):
-        if hasattr(base_class, attr_name):
-            if (isinstance(getattr(base_class, attr_name), property) and
-                    not isinstance(getattr(type(obj), attr_name), property)):
-                raise NameError(f"'{attr_name}' is an invalid name for an attribute in a sequenced or nested struct")
+    obj_type = as_type(obj)
+    for attr_name in _property_names(base_class):
+        if hasattr(obj_type, attr_name) and not isinstance(getattr(obj_type, attr_name), property):
+            raise NameError(f"'{attr_name}' is an invalid name for an attribute in a sequenced or nested struct")
+
+
+@lru_cache(maxsize=None)
+def _property_names(cls) -> tuple:
+    return tuple(attr_name for attr_name in dir(cls) if isinstance(getattr(cls, attr_name), property))
+
+
+@lru_cache(maxsize=None)
+def enum_members(enum_class) -> dict:
+    """
+    :return: A mapping of the values of an enum class to its' members, computed once for every enum class.
+    """
+    return {member.value: member for member in enum_class.__members__.values()}
+
+
+def coalesce_buffers(buffers: Iterable[Union[bytes, memoryview]],
+                     threshold: int = BUFFER_COPY_THRESHOLD) -> Iterator[Union[bytes, memoryview]]:
+    """
+    Join consecutive small buffers into one, so there aren't too many buffers to send.
+    Buffers of at least threshold bytes are yielded as-is (without copying them), empty buffers are dropped.
+    """
+    pending = []
+    for buffer in buffers:
+        if len(buffer) >= threshold:
+            if pending:
+                yield b''.join(pending)
+                pending = []
+            yield buffer
+        elif buffer:
+            pending.append(buffer)
+    if pending:
+        yield b''.join(pending)
+
+
+def touch(obj):
+    """
+    Mark an object (and every object that contains it) as changed, by incrementing its' version.
+    Versions are used to invalidate cached data, like serialized bytes.
+    """
+    while obj is not None:
+        object.__setattr__(obj, '_version', obj._version + 1)
+        obj = obj._parent
@@ -0,0 +1,151 @@
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple, Iterable, Any, Dict
+
+# Byte order characters of the struct module, by the endianness format of the scalars.
+# The default (native) byte order uses '=' so that the struct module won't add alignment padding.
+_byte_orders = {'': '=', '@': '=', '=': '=', '!': '>', '<': '<', '>': '>'}
+
+# Format characters that have a byte order (other characters, like 'B' or 's', are single bytes)
+_ordered_chars = set('HIQhiqfd')
+
+# Format characters of scalars, whose values can be packed into a buffer directly
+_scalar_chars = set('BHIQbhiqfd')
+
+
+def byte_order(endianness_format: str) -> str:
+    """
+    :return: The struct module byte order character for the endianness format of a scalar
+    """
+    return _byte_orders[endianness_format]
+
+
+def combine_formats(formats: Iterable[Optional[str]]) -> Optional[str]:
+    """
+    Combine struct formats (that start with a byte order character) into a single format.
+
+    :return: The combined format, or None if one of the formats is None or their byte orders are different
+    """
+    orders = set()
+    body = []
+    for fmt in formats:
+        if fmt is None:
+            return None
+        order, codes = fmt[0], fmt[1:]
+        if _ordered_chars.intersection(codes):
+            orders.add(order)
+        body.append(codes)
+
+    if len(orders) > 1:
+        return None
+    return '{}{}'.format(orders.pop() if orders else '=', ''.join(body))
+
+
+def repeat_format(fmt: Optional[str], count: int) -> Optional[str]:
+    """
+    :return: A format of count consecutive items of the given format
+    """
+    if fmt is None:
+        return None
+    order, codes = fmt[0], fmt[1:]
+    if len(codes) == 1:
+        return '{}{}{}'.format(order, count, codes)
+    return '{}{}'.format(order, codes * count)
+
+
+class FieldLayout(NamedTuple):
+    name: str
+    field: Any                  # The field object the layout was computed from
+    offset: Optional[int]       # The offset of the field in the Struct, None if it depends on variable-size fields
+    size: Optional[int]         # The size of the field, None if its' size is variable
+    format: Optional[str]       # The struct format of the field, None if it can't be described by one
+
+    @property
+    def is_static(self) -> bool:
+        """
+        Whether the field is always in the same position, and has the same size
+        """
+        return self.offset is not None and self.size is not None
+
+    @property
+    def is_scalar(self) -> bool:
+        """
+        Whether the value of the field is a single number, that can be packed with the field's format
+        """
+        return self.format is not None and len(self.format) == 2 and self.format[1] in _scalar_chars
+
+
+class StructLayout:
+    """
+    The positions and sizes of the fields of a Struct, as far as they can be known without any values.
+    """
+
+    def __init__(self, fields: Iterable[Tuple[str, Any]]):
+        """
+        :param fields:  (name, field) tuples of the Struct, in order
+        """
+        self.fields: Tuple[FieldLayout, ...] = ()
+        self.by_name: Dict[str, FieldLayout] = {}
+
+        offset = 0
+        for name, field in fields:
+            size, fmt = field_layout_info(field)
+            field_layout = FieldLayout(name, field, offset, size, fmt)
+            self.fields += (field_layout,)
+            self.by_name[name] = field_layout
+
+            # Fields after a variable-size field don't have a static offset
+            offset = None if offset is None or size is None else offset + size
+
+        # The total size, None if the Struct has variable-size fields
+        self.size: Optional[int] = offset
+        # The struct format of the entire Struct, None if it can't be described by one
+        self.format: Optional[str] = combine_formats(f.format for f in self.fields)
+
+    def __getitem__(self, name: str) -> FieldLayout:
+        return self.by_name[name]
+
+    def __iter__(self):
+        return iter(self.fields)
+
+    def __repr__(self):
+        return '{}({})'.format(self.__class__.__qualname__,
+                               ', '.join('{}@{}:{}'.format(f.name, f.offset, f.size) for f in self.fields))
+
+
+def field_layout_info(field) -> Tuple[Optional[int], Optional[str]]:
+    """
+    :return: (size, format) of the field, None where they aren't static
+    """
+    # Fields with from_bytes hooks might be changed when deserializing
+    if getattr(field, '_from_bytes_hooks', None):
+        return None, None
+    # noinspection PyProtectedMember
+    return field._layout_info()
+
+
+def check_fixed_size(layout: StructLayout, name: str) -> None:
+    """
+    :raises TypeError: If the layout doesn't have a fixed (non-zero) size, which is required to handle
+                       consecutive records (e.g. as columns)
+    """
+    if not layout.size:
+        raise TypeError(f'Only Structs with a fixed (non-zero) size are supported, unlike {name}')
+
+
+@lru_cache(maxsize=None)
+def record_format(layout: StructLayout, names: Tuple[str, ...]) -> Optional[str]:
+    """
+    :return: A struct format of a whole record, that unpacks only the fields with the given names (in order of
+             their offsets), the other fields are skipped with pad bytes.
+             None if the fields can't be described by a single format (e.g. their byte orders are different).
+    """
+    formats = []
+    position = 0
+    for field_layout in sorted((layout[name] for name in names), key=lambda f: f.offset):
+        if field_layout.offset > position:
+            formats.append('={}x'.format(field_layout.offset - position))
+        formats.append(field_layout.format)
+        position = field_layout.offset + field_layout.size
+    if layout.size > position:
+        formats.append('={}x'.format(layout.size - position))
+    return combine_formats(formats)
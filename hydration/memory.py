@@ -0,0 +1,163 @@
+import gc
+import sys
+import tracemalloc
+import types
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from typing import Dict, Optional, Set, Callable, Any
+
+# Objects of these types are shared (and not part of the footprint of the objects that reference them)
+_shared_types = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+# The active AllocationTracker (see track_allocations)
+tracker = None
+
+
+def deep_size(obj, seen: Optional[Set[int]] = None) -> int:
+    """
+    :param obj:     The object to measure
+    :param seen:    The ids of objects that were already counted (and shouldn't be counted again), updated in-place
+    :return:        The size (in bytes) of the object and all the objects it references, each is counted once.
+                    Classes, modules and functions aren't counted.
+    """
+    seen = set() if seen is None else seen
+    size = 0
+    pending = [obj]
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen or isinstance(obj, _shared_types):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        pending.extend(gc.get_referents(obj))
+    return size
+
+
+class MemoryReport:
+    """
+    The memory footprint of a Struct or a Message, by its' fields (or layers)
+    """
+
+    def __init__(self, name: str, total: int, wire_size: int, parts: Dict[str, int]):
+        """
+        :param name:        The name of the reported object
+        :param total:       The size of the object in memory (including everything it references)
+        :param wire_size:   The size of the serialized object
+        :param parts:       The sizes of the fields (or layers) of the object. Objects that are shared between
+                            parts are counted in the first one. The object itself and its' other attributes are
+                            counted as 'overhead'.
+        """
+        self.name = name
+        self.total = total
+        self.wire_size = wire_size
+        self.parts = parts
+
+    def __str__(self):
+        width = max(map(len, self.parts), default=0)
+        lines = [f'{self.name}: {self.total} bytes in memory, {self.wire_size} bytes serialized']
+        lines.extend('\t{}  {}'.format(name.ljust(width), size) for name, size in self.parts.items())
+        return '\n'.join(lines)
+
+    def __repr__(self):
+        return '{}({}, total={}, wire_size={})'.format(self.__class__.__qualname__, self.name, self.total,
+                                                       self.wire_size)
+
+
+def memory_report(obj) -> MemoryReport:
+    """
+    Measure the memory footprint of a Struct or a Message (including field objects, validators, sequences, etc.).
+
+    :param obj: A Struct or a Message, or a Struct class (a default instance is measured)
+    :return:    A MemoryReport, with the size of every field (or layer)
+    """
+    from .base import Struct, StructMeta
+    from .message import Message
+
+    if isinstance(obj, StructMeta):
+        obj = obj()
+
+    seen = {id(obj)}
+    # The objects that contain obj aren't part of its' footprint
+    parent = getattr(obj, '_parent', None)
+    while parent is not None:
+        seen.add(id(parent))
+        parent = parent._parent
+
+    parts = OrderedDict()
+    if isinstance(obj, Struct):
+        name = type(obj).__qualname__
+        for field_name, field in obj:
+            parts[field_name] = deep_size(field, seen)
+        wire_size = len(obj)
+    elif isinstance(obj, Message):
+        name = 'Message'
+        for index, layer in enumerate(obj.layers):
+            parts['{}: {}'.format(index, type(layer).__qualname__)] = deep_size(layer, seen)
+        wire_size = obj.size
+    else:
+        raise TypeError(f'Expected a Struct or a Message, got {type(obj).__qualname__}')
+
+    parts['overhead'] = sys.getsizeof(obj) + deep_size(vars(obj), seen)
+    return MemoryReport(name, sum(parts.values()), wire_size, parts)
+
+
+class AllocationTracker:
+    """
+    The memory allocated by Structs while deserializing and serializing them (see track_allocations)
+    """
+
+    def __init__(self):
+        # Maps (Struct class, operation) to the number of calls, and the memory that was allocated (and not freed)
+        self.calls: Dict[tuple, int] = defaultdict(int)
+        self.allocated: Dict[tuple, int] = defaultdict(int)
+        self._measuring = False
+
+    def measure(self, cls, operation: str, func: Callable[[], Any]):
+        """
+        Call func, and attribute the memory it allocated to the Struct class.
+        Nested Structs are attributed to the outermost Struct.
+        """
+        if self._measuring:
+            return func()
+
+        self._measuring = True
+        before = tracemalloc.get_traced_memory()[0]
+        try:
+            return func()
+        finally:
+            self.allocated[cls, operation] += tracemalloc.get_traced_memory()[0] - before
+            self.calls[cls, operation] += 1
+            self._measuring = False
+
+    def __str__(self):
+        lines = []
+        for (cls, operation), size in sorted(self.allocated.items(), key=lambda item: -item[1]):
+            calls = self.calls[cls, operation]
+            lines.append(f'{cls.__qualname__}.{operation}: {size} bytes in {calls} calls '
+                         f'({size // calls} bytes per call)')
+        return '\n'.join(lines)
+
+
+@contextmanager
+def track_allocations():
+    """
+    Track the memory that's allocated by Struct.from_bytes and Struct.serialize (using tracemalloc),
+    by the Struct class. Only the memory that's still allocated when the call returns is counted.
+
+    >>> with track_allocations() as allocations:
+    ...     cache = [Header.from_bytes(data) for data in packets]
+    >>> print(allocations)
+    Header.from_bytes: 2752000 bytes in 1000 calls (2752 bytes per call)
+    """
+    global tracker
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+
+    previous, tracker = tracker, AllocationTracker()
+    try:
+        yield tracker
+    finally:
+        tracker = previous
+        if started:
+            tracemalloc.stop()
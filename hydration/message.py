@@ -1,20 +1,59 @@
 import inspect
+import socket
 from abc import ABC, abstractmethod
-from contextlib import suppress
-from typing import List, Union, Type, Mapping
+from contextlib import suppress, contextmanager, ExitStack
+from functools import lru_cache
+from typing import List, Union, Type, Mapping, Dict, Tuple, Iterator, Callable, Sequence
 
-from hydration.helpers import as_obj
+from hydration.helpers import as_obj, touch, coalesce_buffers
 from .base import Struct
+from .checksums import Checksum, CRC32, as_checksum
 from .fields import Field
 from .validators import ValidatorABC, as_validator
 
 FieldType = Union[Field, Struct, Type[Field], Type[Struct]]
 
 
+class _Layers(list):
+    """
+    The layers of a Message, a list that invalidates the index of the message whenever it changes.
+    """
+
+    def __init__(self, message: 'Message', layers=()):
+        super().__init__(layers)
+        self._message = message
+
+    def _changed(self):
+        self._message._invalidate_index()
+
+
+def _invalidating(name: str):
+    method = getattr(list, name)
+
+    def wrapper(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        self._changed()
+        return result
+
+    wrapper.__name__ = name
+    return wrapper
+
+
+for _name in ('__setitem__', '__delitem__', '__iadd__', '__imul__', 'append', 'extend', 'insert', 'pop', 'remove',
+              'clear', 'sort', 'reverse'):
+    setattr(_Layers, _name, _invalidating(_name))
+
+
 class Message:
+    # Maps the types of the layers (and their base classes) to their positions, and the ids of the layers to their
+    # position. Built when a layer is first looked up, and invalidated whenever the layers change.
+    _index: Tuple[Dict[type, List[int]], Dict[int, int]] = None
+    # Whether MetaFields are updated only when the current batch ends (see batch)
+    _batching = False
+
     def __init__(self, *layers, update_metadata: bool = True):
 
-        self.layers: List[Struct] = []
+        self.layers = []
 
         for layer in layers:
             # Messages are flat, they will not contain other messages, so just add its' layers
@@ -30,7 +69,90 @@ class Message:
             self._update_metas()
 
     def serialize(self):
-        return b''.join(bytes(layer) for layer in self.layers)
+        checksums = _dependency_order(list(self._checksum_fields()), len(self.layers))
+        if not checksums:
+            return b''.join(bytes(layer) for layer in self.layers)
+
+        # Every layer is serialized once, the checksums are computed over the serialized layers and patched in
+        buffer = bytearray()
+        spans = []
+        for layer in self.layers:
+            start = len(buffer)
+            buffer += bytes(layer)
+            spans.append((start, len(buffer)))
+
+        with memoryview(buffer) as view:
+            chunks = [view[start:end] for start, end in spans]
+            for index, name, field in checksums:
+                offset = _field_offset(self.layers[index], name)
+                field.value = field.compute(chunks, index, offset)
+                position = spans[index][0] + offset
+                buffer[position:position + field.size] = bytes(field)
+            for chunk in chunks:
+                chunk.release()
+
+        return bytes(buffer)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, *layers: Union[Type[Struct], Struct, Type[bytes]]) -> 'Message':
+        """
+        Deserialize a message of consecutive layers, and verify its' checksums (without serializing it again).
+
+        >>> Message.from_bytes(data, Header, Body, Footer)
+
+        :param data:    The raw data to parse
+        :param layers:  The Structs of the layers (or instances to deserialize into),
+                        the last layer may be `bytes` for the rest of the data
+        :return:        The deserialized message
+        :raises:        ValueError if the data is invalid, or a checksum doesn't match
+        """
+        view = memoryview(data).cast('B')
+        decoded = []
+        spans = []
+        offset = 0
+        for layer in layers:
+            if layer is bytes:
+                obj = bytes(view[offset:])
+                end = len(view)
+            else:
+                obj = as_obj(layer)
+                end = offset + obj.decode(view, offset)
+            decoded.append(obj)
+            spans.append((offset, end))
+            offset = end
+
+        if offset != len(view):
+            raise ValueError(f'{len(view) - offset} bytes were left after deserializing the message')
+
+        message = cls(*decoded, update_metadata=False)
+        chunks = [view[start:end] for start, end in spans]
+        for index, name, field in message._checksum_fields():
+            expected = field.compute(chunks, index, _field_offset(decoded[index], name))
+            if field.value != expected:
+                raise ValueError(f"Invalid checksum in '{name}' of {type(decoded[index]).__qualname__}: "
+                                 f"{field.value}, expected {expected}")
+        return message
+
+    def _checksum_fields(self) -> Iterator[Tuple[int, str, 'ChecksumField']]:
+        """
+        :return: (layer index, field name, field) of all the ChecksumFields in the message
+        """
+        for index, layer in enumerate(self.layers):
+            if isinstance(layer, Struct):
+                for name in _checksum_names(type(layer)):
+                    yield index, name, getattr(layer, name)
+
+    def iter_buffers(self) -> Iterator[Union[bytes, memoryview]]:
+        """
+        Serialize the message into buffers, whose concatenation is the serialized message.
+        Large bytes layers and payload fields are passed as-is (see Struct.iter_buffers).
+        Messages with checksums are serialized into a single buffer.
+        """
+        if any(True for _ in self._checksum_fields()):
+            return iter((self.serialize(),))
+        return coalesce_buffers(buffer
+                                for layer in self.layers
+                                for buffer in (layer.iter_buffers() if isinstance(layer, Struct) else (layer,)))
 
     def _update_metas(self):
         """
@@ -44,11 +166,61 @@ class Message:
                 if isinstance(field, MetaField):
                     field.update(self, layer, index)
 
+    @property
+    def layers(self) -> List[Union[Struct, bytes]]:
+        return self._layers
+
+    @layers.setter
+    def layers(self, layers):
+        object.__setattr__(self, '_layers', _Layers(self, layers))
+        self._invalidate_index()
+
     def __setattr__(self, key, value):
         super().__setattr__(key, value)
-        if key != 'layers':
+        if key != 'layers' and not self._batching:
             self._update_metas()
 
+    @contextmanager
+    def batch(self):
+        """
+        Change the message (and its' layers) without updating the MetaFields after every change,
+        they're updated once when the batch ends. See Struct.batch.
+        """
+        if self._batching:
+            yield self
+            return
+
+        with ExitStack() as layers:
+            for layer in self.layers:
+                if isinstance(layer, Struct):
+                    layers.enter_context(layer.batch())
+            object.__setattr__(self, '_batching', True)
+            try:
+                yield self
+            finally:
+                object.__setattr__(self, '_batching', False)
+        self._update_metas()
+
+    def _invalidate_index(self):
+        object.__setattr__(self, '_index', None)
+
+    def _layer_index(self) -> Tuple[Dict[type, List[int]], Dict[int, int]]:
+        if self._index is None:
+            types = {}
+            identities = {}
+            for position, layer in enumerate(self.layers):
+                identities.setdefault(id(layer), position)
+                # A layer is an instance of every class in its' MRO
+                for cls in type(layer).__mro__:
+                    types.setdefault(cls, []).append(position)
+            object.__setattr__(self, '_index', (types, identities))
+        return self._index
+
+    def __reduce__(self):
+        # The layers are pickled on their own (Structs are pickled in their serialized form).
+        # The index isn't pickled, it contains the ids of the layers (which are different in a copy).
+        return _rebuild_message, (type(self), tuple(self.layers))
+
     def __eq__(self, other):
         if isinstance(other, Message):
             return all(l1 == l2 for l1, l2 in zip(self, other))
@@ -82,28 +254,22 @@ class Message:
         elif isinstance(item, tuple):
             item, occurrence_to_find = item
         elif isinstance(item, Struct):
-            for index, layer in enumerate(self.layers):
-                if item is layer:
-                    return index
-            else:
-                raise KeyError(f"Couldn't find any layer that is {item}")
+            try:
+                return self._layer_index()[1][id(item)]
+            except KeyError:
+                raise KeyError(f"Couldn't find any layer that is {item}") from None
         else:
             raise TypeError('Invalid type for operation')
 
-        occurrences = 0
-        # Loop through the layers to find the required occurrence of item
-        for index, layer in enumerate(self.layers):
-            if isinstance(layer, item):
-                if occurrence_to_find == occurrences:
-                    return index
-                else:
-                    occurrences += 1
+        # Positions of all the layers that are instances of item
+        positions = self._layer_index()[0].get(item, ())
 
-        if occurrences == 0:
+        if not positions:
             raise KeyError(f"Couldn't find any layer that's an instance of {item}")
-        else:
-            raise KeyError(f"Found only {occurrences + 1} occurrences of {item}, "
+        elif not 0 <= occurrence_to_find < len(positions):
+            raise KeyError(f"Found only {len(positions)} occurrences of {item}, "
                            f"but expected to find at least {occurrence_to_find + 1}")
+        return positions[occurrence_to_find]
 
     def __getitem__(self, item):
         # Single item lookup (class and/or index based)
@@ -125,13 +291,15 @@ class Message:
                 raise ValueError(f'Length of assigned value ({len(value)}) '
                                  f'doesn\'t match the length of the slice ({slice_length})')
             self.layers[key] = value
-        if update_metas:
+        self._invalidate_index()
+        if update_metas and not self._batching:
             self._update_metas()
 
     def __contains__(self, item):
-        if isinstance(item, Struct) or issubclass(item, Struct):
-            with suppress(KeyError):
-                return bool(self[item])
+        if isinstance(item, Struct):
+            return id(item) in self._layer_index()[1]
+        if issubclass(item, Struct):
+            return item in self._layer_index()[0]
         return False
 
     def __len__(self):
@@ -143,6 +311,91 @@ class Message:
         return sum(len(layer) for layer in self.layers)
 
 
+def _dependency_order(checksums: list, layer_count: int) -> list:
+    """
+    Order the checksums of a message so every checksum is computed after the checksums it covers.
+
+    :param checksums:   (layer index, field name, field) of the ChecksumFields of the message
+    :param layer_count: The number of layers in the message
+    :return:            The checksums, in the order they should be computed
+    :raises:            ValueError if checksums cover each other (their values would depend on each other)
+    """
+    pending = {id(field): set() for _, _, field in checksums}
+    for index, _, field in checksums:
+        covered = field.covered_layers(index, layer_count)
+        for other_index, _, other in checksums:
+            if other is not field and other_index in covered:
+                pending[id(field)].add(id(other))
+
+    ordered = []
+    remaining = list(checksums)
+    while remaining:
+        # The last checksums are computed first (they're usually covered by the ones before them)
+        ready = [item for item in reversed(remaining) if not pending[id(item[2])]]
+        if not ready:
+            names = ', '.join(f'{type(field).__qualname__} {name!r} (layer {index})' for index, name, field in remaining)
+            raise ValueError(f'The scopes of these checksums cover each other: {names}')
+        for item in ready:
+            remaining.remove(item)
+            ordered.append(item)
+            for dependencies in pending.values():
+                dependencies.discard(id(item[2]))
+    return ordered
+
+
+def _field_offset(struct: Struct, name: str) -> int:
+    """
+    :return: The offset of a field in the serialized Struct
+    """
+    offset = type(struct).layout[name].offset
+    if offset is None:
+        offset = 0
+        for field_name, field in struct:
+            if field_name == name:
+                break
+            offset += field.size
+    return offset
+
+
+@lru_cache(maxsize=None)
+def _checksum_names(struct_class) -> tuple:
+    return tuple(name for name in struct_class._field_names if isinstance(getattr(struct_class, name), ChecksumField))
+
+
+def _rebuild_message(message_class: Type[Message], layers: tuple) -> Message:
+    return message_class(*layers, update_metadata=False)
+
+
+# The maximal number of buffers that can be passed to a single sendmsg call (IOV_MAX on most systems)
+_MAX_BUFFERS = 1024
+
+
+def sendmsg(sock: socket.socket, message: Union[Message, Struct]) -> int:
+    """
+    Send a Message (or a Struct) over a socket, using socket.sendmsg to send all of its' buffers without joining them.
+    Partial sends are continued until the entire message is sent.
+
+    :param sock:    The socket to send the message with
+    :param message: The message to send
+    :return:        The number of bytes sent
+    """
+    buffers = [memoryview(buffer).cast('B') for buffer in message.iter_buffers()]
+    total = 0
+    position = 0
+    while position < len(buffers):
+        sent = sock.sendmsg(buffers[position:position + _MAX_BUFFERS])
+        total += sent
+
+        # Skip the buffers that were sent entirely, and the sent part of the last one
+        while position < len(buffers) and sent >= len(buffers[position]):
+            sent -= len(buffers[position])
+            position += 1
+        if sent:
+            buffers[position] = buffers[position][sent:]
+
+    return total
+
+
 class MetaField(Field, ABC):
     """
     A Field that contains metadata (data about the message)
@@ -150,6 +403,11 @@ class MetaField(Field, ABC):
 
     def __init__(self, data_field: FieldType):
         self.data_field = as_obj(data_field)
+        self._link_data_field()
+
+    def _link_data_field(self):
+        # Changes of the data field (e.g. when it's decoded) are changes of this field
+        object.__setattr__(self.data_field, '_parent', self)
 
     @property
     def validator(self) -> ValidatorABC:
@@ -166,6 +424,7 @@ class MetaField(Field, ABC):
     @value.setter
     def value(self, value):
         self.data_field.value = value
+        touch(self)
 
     def __repr__(self) -> str:
         return repr(self.data_field)
@@ -184,7 +443,21 @@ class MetaField(Field, ABC):
         return bytes(self.data_field)
 
     def from_bytes(self, data: bytes):
-        return self.data_field.from_bytes(data)
+        result = self.data_field.from_bytes(data)
+        touch(self)
+        return result
+
+    def decode(self, data: bytes, offset: int = 0) -> int:
+        consumed = self.data_field.decode(data, offset)
+        touch(self)
+        return consumed
+
+    def _layout_info(self):
+        return self.data_field._layout_info()
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self._link_data_field()
 
     @abstractmethod
     def update(self, message: Message, struct: Struct, struct_index: int):
@@ -212,3 +485,65 @@ class OpcodeField(MetaField):
             if not self.validator:
                 self.validator = as_validator(set(self.opcode_dictionary.values()))
             self.value = self.opcode_dictionary[type(message[struct_index + 1])]
+
+
+class ChecksumField(MetaField):
+    """
+    A checksum of some of the layers of the message. It's computed while the message is serialized
+    (over the serialized layers, so nothing is serialized twice), and verified by Message.from_bytes.
+    The bytes of the field itself are zeros when the checksum is computed.
+    A checksum that covers other checksums is computed after them (so it covers their final values),
+    checksums can't cover each other.
+    """
+    # The layers the checksum covers, relative to its' struct
+    scopes = ('struct', 'preceding', 'following', 'message')
+
+    def __init__(self, data_field: FieldType, algorithm: Union[Checksum, Callable[[bytes], int]] = CRC32,
+                 scope: str = 'struct'):
+        """
+        :param data_field:  The field that contains the checksum
+        :param algorithm:   A Checksum (like CRC32, ADLER32 or INTERNET from hydration.checksums),
+                            or a function that receives the covered data and returns its' checksum
+        :param scope:       'struct' - only the struct of the field, 'preceding' - the layers before the struct,
+                            'following' - the layers after the struct, 'message' - all the layers
+        """
+        super().__init__(data_field)
+        if scope not in self.scopes:
+            raise ValueError(f'Invalid scope: {scope}, expected one of {self.scopes}')
+        self.algorithm = as_checksum(algorithm)
+        self.scope = scope
+
+    def update(self, message: Message, struct: Struct, struct_index: int):
+        # The checksum is computed when the message is serialized
+        pass
+
+    def covered_layers(self, struct_index: int, layer_count: int) -> range:
+        """
+        :return: The indexes of the layers the checksum covers
+        """
+        if self.scope == 'struct':
+            return range(struct_index, struct_index + 1)
+        elif self.scope == 'preceding':
+            return range(struct_index)
+        elif self.scope == 'following':
+            return range(struct_index + 1, layer_count)
+        return range(layer_count)
+
+    def compute(self, layers: Sequence[bytes], struct_index: int, offset: int) -> int:
+        """
+        :param layers:          The serialized layers of the message
+        :param struct_index:    The index of the struct of the field
+        :param offset:          The offset of the field in its' struct
+        :return:                The checksum of the covered layers
+        """
+        def covered():
+            for index in self.covered_layers(struct_index, len(layers)):
+                layer = layers[index]
+                if index == struct_index:
+                    yield layer[:offset]
+                    yield bytes(self.size)
+                    yield layer[offset + self.size:]
+                else:
+                    yield layer
+
+        return self.algorithm.compute(covered())
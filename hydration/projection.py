@@ -0,0 +1,134 @@
+import copy
+import struct
+from collections import namedtuple
+from contextlib import suppress
+from typing import NamedTuple, Optional, Any, Tuple
+
+from .fields import VLA, Switch
+from .vectors import Bytes
+
+
+class _Step(NamedTuple):
+    name: str
+    field: Any                      # The field of the Struct class (copied when its' value is needed)
+    offset: Optional[int]           # The static offset of the field, if it has one
+    size: Optional[int]             # The static size of the field, if it has one
+    unpacker: Optional[struct.Struct]   # Used to decode scalars directly
+    item_size: Optional[int]        # The size of every item of a VLA, if it's static
+    store: bool                     # Whether the value of the field is needed (requested, or a length of a VLA)
+
+
+def _item_size(field) -> Optional[int]:
+    """
+    :return: The static size of every item of a VLA (so it can be skipped without decoding it)
+    """
+    if isinstance(field, Bytes):
+        return 1
+    with suppress(AttributeError):
+        # noinspection PyProtectedMember
+        return field.type._layout_info()[0]
+    return None
+
+
+class Projection:
+    """
+    Decodes only some of the fields of a Struct, the other fields are skipped (by their offsets).
+    Fields after variable-size fields can be projected as well, only the lengths of VLAs before them are decoded.
+
+    >>> classify = Header.projection('opcode', 'src')
+    >>> classify(data).opcode
+    7
+    """
+
+    def __init__(self, struct_class, names: Tuple[str, ...]):
+        """
+        :param struct_class:    The Struct to decode
+        :param names:           The names of the fields to decode
+        """
+        layout = struct_class.layout
+        for name in names:
+            if name not in layout.by_name:
+                raise AttributeError(f'{struct_class.__qualname__} has no field {name}')
+
+        self.struct_class = struct_class
+        self.names = names
+        self.result_type = namedtuple(f'{struct_class.__name__}Projection', names)
+
+        # Only the fields up to the last requested field are needed
+        last = max(layout.fields.index(layout[name]) for name in names) if names else -1
+        field_layouts = layout.fields[:last + 1]
+
+        # Fields with from_bytes hooks might be changed while deserializing, so the entire Struct is decoded
+        self._decode_all = any(getattr(f.field, '_from_bytes_hooks', None) for f in field_layouts)
+
+        # The lengths of VLAs and the discriminators of Switches are needed to decode the fields after them
+        lengths = {f.field.length_field_name for f in field_layouts if isinstance(f.field, VLA)}
+        lengths.update(f.field.discriminator_name for f in field_layouts if isinstance(f.field, Switch))
+        self._steps = tuple(
+            _Step(name=f.name,
+                  field=f.field,
+                  offset=f.offset,
+                  size=f.size,
+                  unpacker=struct.Struct(f.format) if f.is_scalar else None,
+                  item_size=_item_size(f.field) if isinstance(f.field, VLA) else None,
+                  store=f.name in names or f.name in lengths)
+            for f in field_layouts)
+        # Copies of variable-size fields, that are decoded only to find their size
+        self._scratch = {}
+
+    def __call__(self, data: bytes, *args):
+        """
+        :param data:    The serialized Struct
+        :param args:    Arguments for the __init__ of the Struct, if there's any (used only if it's fully decoded)
+        :return:        A namedtuple of the values of the projected fields
+        """
+        if self._decode_all:
+            obj = self.struct_class.from_bytes(data, *args)
+            return self.result_type(*(getattr(obj, name).value for name in self.names))
+
+        values = {}
+        offset = 0
+        try:
+            for step in self._steps:
+                if step.offset is not None:
+                    offset = step.offset
+
+                if step.store and step.unpacker is not None:
+                    values[step.name] = step.unpacker.unpack_from(data, offset)[0]
+                    offset += step.size
+                elif step.store:
+                    field = copy.deepcopy(step.field)
+                    offset += self._decode(field, data, offset, values)
+                    values[step.name] = field.value
+                elif step.size is not None:
+                    offset += step.size
+                elif step.item_size is not None:
+                    offset += int(values[step.field.length_field_name]) * step.item_size
+                else:
+                    field = self._scratch.get(step.name)
+                    if field is None:
+                        field = self._scratch[step.name] = copy.deepcopy(step.field)
+                    offset += self._decode(field, data, offset, values)
+        except struct.error as e:
+            raise ValueError(str(e)) from e
+
+        if offset > len(data):
+            raise ValueError(f'Expected at least {offset} bytes for {self.struct_class.__qualname__}, '
+                             f'got {len(data)}')
+
+        for name in self.names:
+            with suppress(AttributeError):
+                getattr(self.struct_class, name).validator.validate(values[name])
+
+        return self.result_type(*(values[name] for name in self.names))
+
+    @staticmethod
+    def _decode(field, data: bytes, offset: int, values: dict) -> int:
+        if isinstance(field, VLA):
+            field.length = int(values[field.length_field_name])
+        elif isinstance(field, Switch):
+            field.select(values[field.discriminator_name])
+        return field.decode(data, offset)
+
+    def __repr__(self):
+        return '{}({}, {})'.format(self.__class__.__qualname__, self.struct_class.__qualname__, self.names)
@@ -0,0 +1,232 @@
+import copy
+import struct
+from typing import Union, Iterable, Optional, Iterator
+
+from .base import Struct
+from .columns import decode_columns
+from .layout import FieldLayout
+
+RecordType = Union[Struct, bytes, bytearray, memoryview]
+
+
+class StructArray:
+    """
+    Records of a Struct with a fixed size, stored (serialized) in a single bytearray.
+    Records are accessed through lazy views, whose fields are decoded (or encoded) in-place when they're accessed.
+
+    >>> records = StructArray(Record, 1000)
+    >>> records[3].ts = 1234
+    >>> sum(records['ts'])
+    1234
+    >>> sock.send(records.buffer)
+    """
+
+    def __init__(self, struct_class, count: int = 0, data: Optional[bytes] = None):
+        """
+        :param struct_class:    The Struct of the records
+        :param count:           The number of records to start with (with the default values of the Struct)
+        :param data:            Serialized records to start with (copied), instead of count default records
+        """
+        layout = struct_class.layout
+        if not layout.size:
+            raise TypeError(f'StructArray requires a Struct with a fixed (non-zero) size, '
+                            f'unlike {struct_class.__qualname__}')
+
+        self.struct_class = struct_class
+        self.stride = layout.size
+        self.buffer = bytearray()
+        # The indexes of the records in the buffer, None if all the records are in this array (it's not a slice)
+        self._indexes: Optional[range] = None
+        # Copies of the fields, used to decode and encode fields that aren't scalars
+        self._scratch = {}
+
+        if data is not None:
+            self.extend(data)
+        elif count:
+            self.buffer = bytearray(bytes(struct_class()) * count)
+
+    @classmethod
+    def from_buffer(cls, struct_class, buffer: Union[bytearray, memoryview]) -> 'StructArray':
+        """
+        :return: The records in a writable buffer (e.g. shared memory), which is used as-is (records can't be added)
+        """
+        array = cls(struct_class)
+        if len(buffer) % array.stride:
+            raise ValueError(f'Buffer length ({len(buffer)}) is not a multiple of the size '
+                             f'of {struct_class.__qualname__} ({array.stride})')
+        array.buffer = buffer
+        array._indexes = range(len(buffer) // array.stride)
+        return array
+
+    def _slice(self, indexes: range) -> 'StructArray':
+        array = object.__new__(type(self))
+        array.struct_class = self.struct_class
+        array.stride = self.stride
+        array.buffer = self.buffer
+        array._indexes = indexes
+        array._scratch = self._scratch
+        return array
+
+    def _range(self) -> range:
+        return range(len(self.buffer) // self.stride) if self._indexes is None else self._indexes
+
+    def __len__(self) -> int:
+        return len(self._range())
+
+    def __getitem__(self, item):
+        if isinstance(item, str):
+            return self.column(item)
+        elif isinstance(item, slice):
+            # Slices share the buffer (nothing is copied)
+            return self._slice(self._range()[item])
+        return StructView(self, self._range()[item] * self.stride)
+
+    def __setitem__(self, index: Union[int, slice], record: Union[RecordType, Iterable[RecordType]]):
+        if isinstance(index, slice):
+            # The records are replaced in-place, so there must be as many records as the slice has
+            indexes = self._range()[index]
+            records = list(record)
+            if len(records) != len(indexes):
+                raise ValueError(f'Expected {len(indexes)} records for the slice, got {len(records)}')
+            data = [self._record_bytes(item) for item in records]
+            for position, item in zip(indexes, data):
+                self.buffer[position * self.stride:(position + 1) * self.stride] = item
+            return
+
+        offset = self._range()[index] * self.stride
+        self.buffer[offset:offset + self.stride] = self._record_bytes(record)
+
+    def __iter__(self) -> Iterator['StructView']:
+        return (StructView(self, index * self.stride) for index in self._range())
+
+    def _record_bytes(self, record: RecordType) -> bytes:
+        if isinstance(record, Struct):
+            if not isinstance(record, self.struct_class):
+                raise TypeError(f'Expected {self.struct_class.__qualname__}, got {type(record).__qualname__}')
+            data = bytes(record)
+        else:
+            data = record
+        if len(data) != self.stride:
+            raise ValueError(f'Expected {self.stride} bytes for {self.struct_class.__qualname__}, got {len(data)}')
+        return data
+
+    def _check_resizable(self):
+        if self._indexes is not None:
+            raise TypeError("Records can't be added to a slice of a StructArray, or to an external buffer")
+
+    def append(self, record: RecordType) -> None:
+        """
+        :param record: A Struct, or its' serialized bytes
+        """
+        self._check_resizable()
+        self.buffer += self._record_bytes(record)
+
+    def extend(self, records: Union[Iterable[RecordType], bytes, bytearray, memoryview]) -> None:
+        """
+        :param records: Structs (or their serialized bytes), or the serialized bytes of consecutive records
+        """
+        self._check_resizable()
+        if isinstance(records, (bytes, bytearray, memoryview)):
+            if len(records) % self.stride:
+                raise ValueError(f'Data length ({len(records)}) is not a multiple of the size '
+                                 f'of {self.struct_class.__qualname__} ({self.stride})')
+            self.buffer += records
+        else:
+            for record in records:
+                self.buffer += self._record_bytes(record)
+
+    def column(self, name: str):
+        """
+        :return: The values of a field in all the records (see Struct.decode_columns)
+        """
+        indexes = self._range()
+        if indexes.step == 1:
+            with memoryview(self.buffer) as view:
+                return decode_columns(self.struct_class, view[indexes.start * self.stride:indexes.stop * self.stride],
+                                      (name,))[name]
+        return [getattr(record, name) for record in self]
+
+    def __bytes__(self) -> bytes:
+        if self._indexes is None:
+            return bytes(self.buffer)
+        return b''.join(bytes(record) for record in self)
+
+    def __eq__(self, other):
+        if isinstance(other, StructArray):
+            return self.struct_class is other.struct_class and bytes(self) == bytes(other)
+        return False
+
+    def __repr__(self):
+        return '{}({}, {})'.format(self.__class__.__qualname__, self.struct_class.__qualname__, len(self))
+
+    def _field(self, name: str) -> FieldLayout:
+        try:
+            return self.struct_class.layout[name]
+        except KeyError:
+            raise AttributeError(f'{self.struct_class.__qualname__} has no field {name}') from None
+
+    def _scratch_field(self, field_layout: FieldLayout):
+        field = self._scratch.get(field_layout.name)
+        if field is None:
+            field = self._scratch[field_layout.name] = copy.deepcopy(field_layout.field)
+        return field
+
+    def _get(self, offset: int, name: str):
+        field_layout = self._field(name)
+        if field_layout.is_scalar:
+            return struct.unpack_from(field_layout.format, self.buffer, offset + field_layout.offset)[0]
+
+        data = self.buffer[offset + field_layout.offset:offset + field_layout.offset + field_layout.size]
+        if isinstance(field_layout.field, Struct):
+            # Nested Structs are returned as new objects
+            return type(field_layout.field).from_bytes(data, *field_layout.field._init_args)
+        field = self._scratch_field(field_layout)
+        field.decode(data)
+        return field.value
+
+    def _set(self, offset: int, name: str, value) -> None:
+        field_layout = self._field(name)
+        field = self._scratch_field(field_layout)
+        # Setting the value of the field validates it
+        field.value = value
+        position = offset + field_layout.offset
+        if field_layout.is_scalar:
+            struct.pack_into(field_layout.format, self.buffer, position, field.value)
+        else:
+            self.buffer[position:position + field_layout.size] = bytes(field)
+
+
+class StructView:
+    """
+    A lazy view of a record in a StructArray. Its' fields are decoded when they're read,
+    and are encoded in-place when they're set.
+    """
+    __slots__ = ('_array', '_offset')
+
+    def __init__(self, array: StructArray, offset: int):
+        object.__setattr__(self, '_array', array)
+        object.__setattr__(self, '_offset', offset)
+
+    def __getattr__(self, name: str):
+        return self._array._get(self._offset, name)
+
+    def __setattr__(self, name: str, value):
+        self._array._set(self._offset, name, value)
+
+    def __bytes__(self) -> bytes:
+        return bytes(self._array.buffer[self._offset:self._offset + self._array.stride])
+
+    def to_struct(self) -> Struct:
+        """
+        :return: The record, deserialized into a Struct
+        """
+        return self._array.struct_class.from_bytes(bytes(self))
+
+    def __eq__(self, other):
+        if isinstance(other, (StructView, Struct)):
+            return bytes(self) == bytes(other)
+        return False
+
+    def __repr__(self):
+        return '{}({}, offset={})'.format(self.__class__.__qualname__, self._array.struct_class.__qualname__,
+                                          self._offset)
@@ -6,7 +6,8 @@ from math import trunc, floor, ceil
 from typing import Union, Callable, Type, Optional
 
 from .endianness import Endianness
-from .helpers import as_obj
+from .helpers import as_obj, touch, enum_members
+from .layout import byte_order
 from .fields import Field
 from .validators import ValidatorABC, ValidatorType, as_validator
 
@@ -30,6 +31,7 @@ class Scalar(Field, Real):
     @endianness_format.setter
     def endianness_format(self, value: Endianness):
         self._endianness_format = value.value
+        touch(self)
 
     @property
     def validator(self) -> ValidatorABC:
@@ -52,6 +54,7 @@ class Scalar(Field, Real):
         if self.validator:
             self.validator.validate(value)
         self._value = value
+        touch(self)
 
     def __repr__(self):
         rep = ['{}({})'.format(self.__class__.__qualname__, self.value)]
@@ -63,7 +66,7 @@ class Scalar(Field, Real):
         return repr(self)
 
     def __len__(self) -> int:
-        return len(bytes(self))
+        return struct.calcsize(self.endianness_format + self.scalar_format)
 
     def __add__(self, other):
         return self.value + other
@@ -128,6 +131,18 @@ class Scalar(Field, Real):
         self.value = struct.unpack(format_string, data)[0]
         return self
 
+    def decode(self, data: bytes, offset: int = 0) -> int:
+        format_string = '{}{}'.format(self.endianness_format, self.scalar_format)
+        try:
+            self.value = struct.unpack_from(format_string, data, offset)[0]
+        except struct.error as e:
+            raise ValueError(f'Error unpacking {self.__class__.__qualname__} at offset {offset}: {str(e)}') from e
+        return struct.calcsize(format_string)
+
+    def _layout_info(self):
+        format_string = byte_order(self.endianness_format) + self.scalar_format
+        return struct.calcsize(format_string), format_string
+
     def __trunc__(self):
         return trunc(self.value)
 
@@ -276,23 +291,40 @@ class Enum(Field):
         super().__init__()
         self.type: _IntScalar = as_obj(scalar_type)
         self.type.validator = as_validator(enum_class)
+        self._link_type()
         if self.type.value != 0:
             raise ValueError('Do not set a value in the given scalar type: {}'.format(scalar_type))
         self.enum_class = enum_class
+        # Maps values to members, shared by all the fields of the same enum class
+        self._members = enum_members(enum_class)
         # noinspection PyTypeChecker
         self.value = value or next(iter(self.enum_class))
 
+    def _link_type(self):
+        # Changes of the scalar (e.g. setting type.value directly) are changes of this field
+        object.__setattr__(self.type, '_parent', self)
+
     @property
     def validator(self) -> ValidatorABC:
         return self.type.validator
 
+    @property
+    def member(self) -> enum.Enum:
+        value = self.type.value
+        try:
+            return self._members[value]
+        except KeyError:
+            # e.g. combinations of flags
+            return self.enum_class(value)
+
     @property
     def value(self):
-        return self.enum_class(self.type.value).value
+        return self.member.value
 
     @value.setter
     def value(self, value: IntEnum):
         self.type.value = value
+        touch(self)
 
     def __repr__(self) -> str:
         return '{}({}, {}, {})'.format(self.__class__.__qualname__,
@@ -313,10 +345,29 @@ class Enum(Field):
             raise ValueError(f'Error serializing {repr(self)}:\n{str(e)}')
 
     def from_bytes(self, data: bytes):
+        # The scalar is validated by the enum's validator
         self.type.from_bytes(data)
-        self.value = self.type.value
+        touch(self)
         return self
 
+    def decode(self, data: bytes, offset: int = 0) -> int:
+        consumed = self.type.decode(data, offset)
+        touch(self)
+        return consumed
+
+    def _layout_info(self):
+        return self.type._layout_info()
+
     @property
     def name(self):
-        return self.enum_class(self.value).name
+        return self.member.name
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state.pop('_members', None)
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self._members = enum_members(self.enum_class)
+        self._link_type()
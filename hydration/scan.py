@@ -0,0 +1,63 @@
+import copy
+import struct
+from typing import Optional, Mapping, Iterator
+
+from .layout import check_fixed_size, record_format
+from .validators import ValidatorType, as_validator
+
+
+def scan(struct_class, data, where: Optional[Mapping[str, ValidatorType]] = None, decode: bool = True) -> Iterator:
+    """
+    Find the records of a Struct (with a fixed size) whose fields match predicates, by testing the raw bytes.
+    See Struct.scan. The arguments are checked when scan is called, not when the records are first iterated.
+    """
+    layout = struct_class.layout
+    check_fixed_size(layout, struct_class.__qualname__)
+
+    view = memoryview(data).cast('B')
+    if len(view) % layout.size:
+        raise ValueError(f'Data length ({len(view)}) is not a multiple of the size '
+                         f'of {struct_class.__qualname__} ({layout.size})')
+
+    where = where or {}
+    for name in where:
+        if name not in layout.by_name:
+            raise AttributeError(f'{struct_class.__qualname__} has no field {name}')
+
+    # Scalars are tested with the values of a single unpack of every record, other fields are decoded into a copy
+    scalars = [(name, as_validator(predicate)) for name, predicate in where.items() if layout[name].is_scalar]
+    others = [(layout[name].offset, copy.deepcopy(layout[name].field), as_validator(predicate))
+              for name, predicate in where.items() if not layout[name].is_scalar]
+
+    # The scalars are unpacked in order of their offsets
+    scalars.sort(key=lambda item: layout[item[0]].offset)
+    validators = [validator for _, validator in scalars]
+    names = tuple(name for name, _ in scalars)
+    fmt = record_format(layout, names)
+    if not scalars:
+        values = (() for _ in range(len(view) // layout.size))
+    elif fmt is not None:
+        values = struct.iter_unpack(fmt, view)
+    else:
+        # The scalars can't be unpacked together (their byte orders are different), so they're unpacked separately
+        unpackers = [(layout[name].offset, struct.Struct(layout[name].format)) for name in names]
+        values = (tuple(unpacker.unpack_from(view, start + offset)[0] for offset, unpacker in unpackers)
+                  for start in range(0, len(view), layout.size))
+
+    return _scan(struct_class, view, layout.size, values, validators, others, decode)
+
+
+def _scan(struct_class, view: memoryview, size: int, values: Iterator, validators: list, others: list,
+          decode: bool) -> Iterator:
+    for index, record_values in enumerate(values):
+        if not all(validator.is_valid(value) for validator, value in zip(validators, record_values)):
+            continue
+
+        start = index * size
+        for offset, field, validator in others:
+            field.decode(view, start + offset)
+            if not validator.is_valid(field.value):
+                break
+        else:
+            record = view[start:start + size]
+            yield struct_class.from_bytes(record) if decode else record
@@ -0,0 +1,215 @@
+import struct
+from contextlib import contextmanager
+from typing import Optional, Union, Iterator
+
+from .base import Struct, StructMeta, _has_bytes_hooks
+from .records import StructArray, StructView
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # Python < 3.8
+    shared_memory = None
+
+# The header of the shared memory: capacity, slot size, head (records pushed) and tail (records popped)
+_header = struct.Struct('=QQQQ')
+_head_offset = 16
+_tail_offset = 24
+# The length prefix of records in slots of variable-size records
+_length_prefix = struct.Struct('=I')
+
+
+class RingBuffer:
+    """
+    A queue of Structs in shared memory, for passing records between a producer process and a consumer process
+    without pickling them. Records are serialized directly into their slot, and are decoded from it.
+
+    Structs with a fixed size are stored as-is, other Structs are stored in slots of slot_size bytes,
+    prefixed by their length.
+
+    There must be a single producer (that pushes) and a single consumer (that pops), there's no locking:
+    only the producer writes the head counter, and only the consumer writes the tail counter.
+    A record is published by writing the head counter after the record is written, and a slot is released by writing
+    the tail counter after the record is read. The counters are aligned 8-byte words, written with a single copy,
+    so this relies on the platform not reordering stores to shared memory (like x86, with its' total store order).
+    On weakly ordered platforms (like ARM), guard push and pop with a multiprocessing.Lock.
+
+    >>> ring = RingBuffer(Record, 1024)
+    >>> Process(target=consume, args=(ring,)).start()  # Or RingBuffer(Record, name=ring.name, create=False)
+    >>> ring.push(Record(ts=5))
+    True
+    >>> ring.pop()  # In the consumer
+    Record(ts=5)
+    """
+
+    def __init__(self, struct_type: Union[StructMeta, Struct], capacity: int = 0, slot_size: Optional[int] = None,
+                 name: Optional[str] = None, create: bool = True):
+        """
+        :param struct_type: The Struct class of the records, or an instance of it (to decode records with its' args)
+        :param capacity:    The maximum number of records in the buffer (when it's created)
+        :param slot_size:   The maximum size of a record, for Structs that don't have a fixed size
+        :param name:        The name of the shared memory (a random one is used when creating it by default)
+        :param create:      Whether to create the shared memory, or to attach to an existing ring buffer
+        """
+        if shared_memory is None:
+            raise ImportError('RingBuffer requires multiprocessing.shared_memory (Python 3.8+)')
+
+        self.struct_type = struct_type
+        if isinstance(struct_type, Struct):
+            self.struct_class, self._init_args = type(struct_type), struct_type._init_args
+        else:
+            self.struct_class, self._init_args = struct_type, ()
+
+        self.fixed = bool(self.struct_class.layout.size)
+        if create:
+            if capacity <= 0:
+                raise ValueError(f'Invalid capacity: {capacity}')
+            if self.fixed:
+                slot_size = self.struct_class.layout.size
+            elif slot_size is None:
+                raise ValueError(f'{self.struct_class.__qualname__} has no fixed size, a slot_size is required')
+            else:
+                slot_size += _length_prefix.size
+            self._shm = shared_memory.SharedMemory(name, create=True, size=_header.size + capacity * slot_size)
+            _header.pack_into(self._shm.buf, 0, capacity, slot_size, 0, 0)
+        else:
+            self._shm = shared_memory.SharedMemory(name)
+        self.capacity, self.slot_size, _, _ = _header.unpack_from(self._shm.buf)
+
+        self._slots = self._shm.buf[_header.size:_header.size + self.capacity * self.slot_size]
+        # Lazy views of fixed-size records, in-place
+        self._records = StructArray.from_buffer(self.struct_class, self._slots) if self.fixed else None
+        # The fast path of push, for Structs whose fields are all scalars
+        layout = self.struct_class.layout
+        if self.fixed and all(f.is_scalar for f in layout) and not _has_bytes_hooks(self.struct_class):
+            self._packer = struct.Struct(layout.format)
+        else:
+            self._packer = None
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def _counter(self, offset: int) -> int:
+        return struct.unpack_from('=Q', self._shm.buf, offset)[0]
+
+    def __len__(self) -> int:
+        return self._counter(_head_offset) - self._counter(_tail_offset)
+
+    def push(self, obj: Struct) -> bool:
+        """
+        Serialize a Struct into the next slot
+
+        :return: False if the buffer is full (and the Struct wasn't pushed)
+        """
+        # Subclasses may have more fields, which wouldn't fit in the slot
+        if type(obj) is not self.struct_class:
+            raise TypeError(f'Expected {self.struct_class.__qualname__}, got {type(obj).__qualname__}')
+
+        head = self._counter(_head_offset)
+        if head - self._counter(_tail_offset) >= self.capacity:
+            return False
+
+        offset = (head % self.capacity) * self.slot_size
+        if self._packer is not None:
+            try:
+                self._packer.pack_into(self._slots, offset, *(field.value for field in obj._fields))
+            except struct.error as e:
+                raise ValueError(str(e)) from e
+        elif self.fixed:
+            # Fields of the instance may have been replaced with fields of a different size
+            if len(obj) != self.slot_size:
+                raise ValueError(f'{type(obj).__qualname__} is {len(obj)} bytes, instead of {self.slot_size}')
+            self._write(obj, offset)
+        else:
+            size = len(obj)
+            if size > self.slot_size - _length_prefix.size:
+                raise ValueError(f'{type(obj).__qualname__} is too large ({size} bytes) for the slots of the ring '
+                                 f'buffer ({self.slot_size - _length_prefix.size} bytes)')
+            _length_prefix.pack_into(self._slots, offset, size)
+            self._write(obj, offset + _length_prefix.size)
+
+        # The record is only visible to the consumer after it's written (see the memory ordering notes above)
+        struct.pack_into('=Q', self._shm.buf, _head_offset, head + 1)
+        return True
+
+    def _write(self, obj: Struct, offset: int):
+        for buffer in obj.iter_buffers():
+            self._slots[offset:offset + len(buffer)] = buffer
+            offset += len(buffer)
+
+    def _record(self, tail: int) -> memoryview:
+        offset = (tail % self.capacity) * self.slot_size
+        size, = _length_prefix.unpack_from(self._slots, offset)
+        offset += _length_prefix.size
+        return self._slots[offset:offset + size]
+
+    def pop(self, decode: bool = True) -> Union[Struct, bytes, None]:
+        """
+        :param decode:  Whether to decode the record, or to return its' serialized bytes
+        :return:        The oldest record (a copy of it), None if the buffer is empty
+        """
+        with self.read() as record:
+            if record is None:
+                return None
+            data = bytes(record)
+        return self.struct_class.from_bytes(data, *self._init_args) if decode else data
+
+    @contextmanager
+    def read(self) -> Iterator[Union[StructView, memoryview, None]]:
+        """
+        Read the oldest record in-place, without copying it. The slot is released when the context ends.
+        Records of Structs with a fixed size are lazy views (see StructArray), other records are memoryviews.
+        None is given if the buffer is empty.
+
+        >>> with ring.read() as record:
+        ...     total += record.ts
+        """
+        tail = self._counter(_tail_offset)
+        if tail == self._counter(_head_offset):
+            yield None
+            return
+
+        if self.fixed:
+            yield self._records[tail % self.capacity]
+        else:
+            with self._record(tail) as record:
+                yield record
+        struct.pack_into('=Q', self._shm.buf, _tail_offset, tail + 1)
+
+    def __iter__(self) -> Iterator[Struct]:
+        """
+        Pop (and decode) records until the buffer is empty
+        """
+        while True:
+            record = self.pop()
+            if record is None:
+                return
+            yield record
+
+    def close(self) -> None:
+        """
+        Detach from the shared memory (it still exists, see unlink)
+        """
+        self._records = None
+        self._slots.release()
+        self._shm.close()
+
+    def unlink(self) -> None:
+        """
+        Destroy the shared memory, should be called once (usually by the process that created it)
+        """
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __reduce__(self):
+        # Other processes attach to the same shared memory
+        return type(self), (self.struct_type, 0, None, self.name, False)
+
+    def __repr__(self):
+        return '{}({}, {}, name={!r})'.format(self.__class__.__qualname__, self.struct_class.__qualname__,
+                                              self.capacity, self.name)
@@ -0,0 +1,77 @@
+import copy
+import struct
+
+from .fields import VLA, Switch
+from .layout import StructLayout
+
+
+class Template(bytearray):
+    """
+    The serialized bytes of a Struct, whose fields can be changed in-place without serializing the Struct again.
+    Only fields with a static offset and size (see StructMeta.layout) can be changed.
+
+    >>> template = Heartbeat(node=3).as_template()
+    >>> template.set('seq', 42)
+    >>> sock.send(template)
+    """
+
+    # noinspection PyUnusedLocal
+    def __new__(cls, obj):
+        return super().__new__(cls)
+
+    def __init__(self, obj):
+        """
+        :param obj: The Struct to create the template from
+        """
+        super().__init__(bytes(obj))
+        self.struct_class = type(obj)
+        # The fields of the instance may differ from the fields of its' class (e.g. a field was replaced)
+        layout = StructLayout(obj)
+
+        # The length fields of VLAs (and discriminators of Switches) can't be changed, the fields would no longer match
+        length_field_names = {field.length_field_name for _, field in obj if isinstance(field, VLA)}
+        length_field_names.update(field.discriminator_name for _, field in obj if isinstance(field, Switch))
+
+        # Maps field names to their offset in the template, only for fields that can be changed
+        self.offsets = {}
+        # Maps field names to (field layout, copy of the field), the copy is used to validate and serialize values
+        self._fields = {}
+
+        for field_layout in layout:
+            if field_layout.is_static and field_layout.name not in length_field_names:
+                self.offsets[field_layout.name] = field_layout.offset
+                self._fields[field_layout.name] = (field_layout, copy.deepcopy(getattr(obj, field_layout.name)))
+
+    def _get_field(self, name: str):
+        try:
+            return self._fields[name]
+        except KeyError:
+            if name in self.struct_class._field_names:
+                raise TypeError(f"Field '{name}' of {self.struct_class.__qualname__} can't be set in a template, "
+                                f"only fields with a static offset and size (that aren't VLA lengths) can") from None
+            raise AttributeError(f"{self.struct_class.__qualname__} has no field '{name}'") from None
+
+    def set(self, name: str, value) -> None:
+        """
+        Set the value of a field, only the bytes of the field are changed.
+
+        :param name:    The name of the field
+        :param value:   The value to set
+        """
+        field_layout, field = self._get_field(name)
+        field.value = value
+        if field_layout.is_scalar:
+            struct.pack_into(field_layout.format, self, field_layout.offset, field.value)
+        else:
+            self[field_layout.offset:field_layout.offset + field_layout.size] = bytes(field)
+
+    def get(self, name: str):
+        """
+        :return: The current value of a field in the template
+        """
+        field_layout, field = self._get_field(name)
+        field.decode(self, field_layout.offset)
+        return field.value
+
+    def __repr__(self):
+        return '{}({}, {})'.format(self.__class__.__qualname__, self.struct_class.__qualname__, bytes(self))
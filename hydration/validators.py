@@ -2,6 +2,8 @@ import enum
 from abc import ABC, abstractmethod
 from typing import Any, Callable, Iterable, Union, Optional
 
+from .helpers import enum_members
+
 
 class ValidatorABC(ABC):
     @abstractmethod
@@ -14,6 +16,16 @@ class ValidatorABC(ABC):
         """
         pass
 
+    def is_valid(self, value: Any) -> bool:
+        """
+        :return: Whether the value is valid (without raising)
+        """
+        try:
+            self.validate(value)
+        except ValueError:
+            return False
+        return True
+
 
 class ValidatorMeta(type):
     def __call__(cls, valid_input) -> ValidatorABC:
@@ -35,6 +47,9 @@ class RangeValidator(ValidatorABC):
         if value not in self.range:
             raise ValueError('Given value {} is not in {}'.format(value, self.range))
 
+    def is_valid(self, value: Any) -> bool:
+        return value in self.range
+
 
 class ExactValueValidator(ValidatorABC):
     def __init__(self, value: Any):
@@ -44,6 +59,9 @@ class ExactValueValidator(ValidatorABC):
         if not self.value == value:
             raise ValueError('Given value {} is not equal to {}'.format(value, self.value))
 
+    def is_valid(self, value: Any) -> bool:
+        return self.value == value
+
 
 class FunctionValidator(ValidatorABC):
     def __init__(self, func: Callable):
@@ -56,6 +74,9 @@ class FunctionValidator(ValidatorABC):
         if not self.func(value):
             raise ValueError('Calling {}({}) returned a False value'.format(self.func.__name__, value))
 
+    def is_valid(self, value: Any) -> bool:
+        return bool(self.func(value))
+
 
 class SetValidator(ValidatorABC):
     def __init__(self, items: set):
@@ -68,6 +89,9 @@ class SetValidator(ValidatorABC):
         if value not in self.items:
             raise ValueError('Given value {} is not in {}'.format(value, self.items))
 
+    def is_valid(self, value: Any) -> bool:
+        return value in self.items
+
 
 class SequenceValidator(ValidatorABC):
     def __init__(self, scalar_validator):
@@ -85,10 +109,21 @@ class SequenceValidator(ValidatorABC):
 class EnumValidator(ValidatorABC):
     def __init__(self, enum_class):
         self.enum_class = enum_class
+        self.values = frozenset(enum_members(enum_class))
 
     def validate(self, value: Any) -> None:
+        try:
+            if value in self.values:
+                return
+        except TypeError:
+            pass
+        # Let the enum class decide (e.g. combinations of flags), raises ValueError if the value is invalid
         self.enum_class(value)
 
+    def __deepcopy__(self, memo):
+        # The validator never changes, so it can be shared
+        return self
+
 
 ValidatorType = Union[_Validator, range, int, tuple, str, set, tuple, list, enum.Enum, Callable]
 
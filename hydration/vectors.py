@@ -5,14 +5,20 @@ from typing import Sequence, Optional, Any, Union, Iterable
 from itertools import islice
 
 from .base import Struct
-from .helpers import as_obj, assert_no_property_override
+from .helpers import as_obj, assert_no_property_override, touch
 from .message import FieldType
 from .fields import Field, VLA
+from .layout import repeat_format
 from .scalars import _IntScalar, UInt8
 from .validators import SequenceValidator, as_validator, ValidatorType, ValidatorABC
+from .addresses import IPv4  # noqa: F401 (IPv4 used to be defined here)
 
 
 class _Sequence(UserList, Field, ABC):
+    # The total size of the items (when it differs between items), used until the sequence changes.
+    # Only used for items of Structs that were defined with cached=True.
+    _size_cache = None
+
     def __init__(self, field_type: FieldType, value: Sequence[Any] = (), validator: Optional[ValidatorType] = None):
         super().__init__()
         self.type = as_obj(field_type)
@@ -35,26 +41,135 @@ class _Sequence(UserList, Field, ABC):
     @value.setter
     def value(self, value):
         self.data = value
+        self._changed()
+
+    def _changed(self):
+        """
+        Must be called after the data changes. Links the Structs in the sequence to it, so their changes are tracked.
+        """
+        for item in self.data:
+            if isinstance(item, Struct):
+                object.__setattr__(item, '_parent', self)
+        self._resized()
+        touch(self)
+
+    def _added(self, items: Sequence[Any]):
+        """
+        Must be called after items are added to the data in-place (instead of _changed, which goes over all the items).
+        """
+        for item in items:
+            if isinstance(item, Struct):
+                object.__setattr__(item, '_parent', self)
+        self._resized()
+        touch(self)
+
+    def _removed(self):
+        """
+        Must be called after items are removed from the data in-place.
+        """
+        self._resized()
+        touch(self)
+
+    def _resized(self):
+        """
+        Called when the number of items may have changed
+        """
+
+    def _check_room(self, count: int):
+        """
+        Make sure that count more items can be added.
+        """
+
+    def _check_items(self, items: Sequence[Any]):
+        """
+        Make sure that items can be added, only the new items are validated.
+        """
+        self._check_room(len(items))
+        self.validator.validate(items)
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self._changed()
 
     def __bytes__(self) -> bytes:
         if len(self.value) != len(self):
             raise ValueError(f'Array value ({self.value}) does not match the provided length ({len(self)}). '
                              f'Consider passing `fill=True` to the {self.__class__.__name__} constructor')
 
-        field_type = copy.deepcopy(self.type)
-
         result = bytearray()
-        for val in self.value:
-            field_type.value = val
-            result.extend(bytes(field_type))
+        if isinstance(self.type, Struct):
+            for val in self.value:
+                result.extend(bytes(val))
+        else:
+            field_type = self._scratch_field()
+            for val in self.value:
+                field_type.value = val
+                result.extend(bytes(field_type))
 
         return bytes(result)
 
     def from_bytes(self, data: bytes):
-        field_type = copy.deepcopy(self.type)
-        self.value = tuple(field_type.from_bytes(chunk).value for chunk in byte_chunks(data, len(field_type)))
+        self.decode(data)
         return self
 
+    def decode(self, data: bytes, offset: int = 0) -> int:
+        start = offset
+        values = []
+
+        if isinstance(self.type, Struct):
+            # Reuse the existing elements, new elements are created with the same arguments as the type
+            struct_type = type(self.type)
+            current = self.data
+            for index in range(len(self)):
+                if index < len(current) and type(current[index]) is struct_type:
+                    element = current[index]
+                else:
+                    element = struct_type(*self.type._init_args)
+                offset += element.decode(data, offset)
+                values.append(element)
+        else:
+            field_type = self._scratch_field()
+            for _ in range(len(self)):
+                offset += field_type.decode(data, offset)
+                values.append(field_type.value)
+
+        self.value = values
+        return offset - start
+
+    def _decode_steps(self):
+        if isinstance(self.type, Struct):
+            # Every element is decoded separately, so decoding can be resumed from the middle of the sequence
+            struct_type = type(self.type)
+            current = self.data
+            values = []
+            for index in range(len(self)):
+                if index < len(current) and type(current[index]) is struct_type:
+                    element = current[index]
+                else:
+                    element = struct_type(*self.type._init_args)
+                yield from element._decode_steps()
+                values.append(element)
+            self.value = values
+        else:
+            data = yield len(self) * self._scratch_field().size
+            self.decode(data)
+
+    def _scratch_field(self):
+        """
+        :return: A copy of the type, used to serialize and deserialize values (reused while the type is the same)
+        """
+        scratch = vars(self).get('_scratch')
+        if scratch is None or scratch[0] is not self.type:
+            scratch = (self.type, copy.deepcopy(self.type))
+            self._scratch = scratch
+        return scratch[1]
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        for key in ('_scratch', '_item_size_cache', '_size_cache'):
+            state.pop(key, None)
+        return state
+
     def __str__(self):
         return '{}{}'.format(self.__class__.__qualname__, self.value)
 
@@ -69,46 +184,98 @@ class _Sequence(UserList, Field, ABC):
         return list(other) + self.data
 
     def __iadd__(self, other):
-        self.value = self.data + list(other)
+        self.extend(other)
         return self
 
+    def _item_size(self) -> Optional[int]:
+        """
+        :return: The size of every item, if it's static (None if items may have different sizes)
+        """
+        item_size = vars(self).get('_item_size_cache')
+        if item_size is None or item_size[0] is not self.type:
+            if isinstance(self.type, Struct):
+                size = type(self.type).layout.size
+            else:
+                # noinspection PyProtectedMember
+                size = self.type._layout_info()[0]
+            item_size = (self.type, size)
+            self._item_size_cache = item_size
+        return item_size[1]
+
     @property
     def size(self):
-        ret_val = 0
+        item_size = self._item_size()
+        if item_size is not None:
+            return len(self.data) * item_size
+
         # The sequences are homogeneous, but the size of each item isn't always the same
-        # So we must loop through all items, and sum their size.
+        # So we must loop through all items, and sum their size (the result is kept until the sequence changes,
+        # if the items are cached Structs)
+        cached = getattr(self.type, '_cached', False)
+        if cached and self._size_cache is not None and self._size_cache[0] == self._version:
+            return self._size_cache[1]
+
+        ret_val = 0
         for val in self.value:
             if isinstance(val, (Field, Struct)):
                 ret_val += val.size
             else:
                 ret_val += self.type.size
 
+        if cached:
+            self._size_cache = (self._version, ret_val)
         return ret_val
 
     def __getitem__(self, item):
         return self.data[item]
 
+    def __setitem__(self, key, item):
+        self.data[key] = item
+        if isinstance(key, slice):
+            self._changed()
+        else:
+            self._added((item,))
+
+    def __delitem__(self, key):
+        del self.data[key]
+        self._removed()
+
+    # The items are changed in-place, only the new items are validated and linked to the sequence.
+    def sort(self, *args, **kwargs):
+        self.data.sort(*args, **kwargs)
+        touch(self)
+
+    def reverse(self):
+        self.data.reverse()
+        touch(self)
+
     def append(self, item) -> None:
-        self.value = self.data + [item]
+        self._check_items((item,))
+        self.data.append(item)
+        self._added((item,))
 
     def insert(self, key: int, item) -> None:
+        self._check_items((item,))
         self.data.insert(key, item)
-        self.value = self.data
+        self._added((item,))
 
-    def pop(self, i: int = ...):
-        self.data.pop(i)
-        self.value = self.data
+    def pop(self, i: int = -1):
+        item = self.data.pop(i)
+        self._removed()
+        return item
 
     def remove(self, item) -> None:
         self.data.remove(item)
-        self.value = self.data
+        self._removed()
 
     def clear(self) -> None:
         self.value = []
 
     def extend(self, other: Iterable) -> None:
-        self.data.extend(other)
-        self.value = self.data
+        items = list(other)
+        self._check_items(items)
+        self.data.extend(items)
+        self._added(items)
 
 
 class Array(_Sequence):
@@ -141,18 +308,34 @@ class Array(_Sequence):
         self.assert_value_not_too_long(value)
         self.data = list(value)
         self.fill_if_necessary()
+        self._changed()
 
-    def __len__(self) -> int:
-        return self.length
+    def _check_room(self, count: int):
+        if len(self.data) + count > len(self):
+            raise ValueError('Length will be too long. Data length was {}. Max is {} but tried to add {}'.format(
+                len(self.data), len(self), count
+            ))
 
-    def __delitem__(self, key) -> None:
-        super().__delitem__(key)
+    def _removed(self):
+        # Fill the removed items with default values
+        count = len(self.data)
         self.fill_if_necessary()
+        self._added(self.data[count:])
+
+    def __len__(self) -> int:
+        return self.length
 
     @property
     def size(self):
         return len(self) * len(self.type)
 
+    def _layout_info(self):
+        # noinspection PyProtectedMember
+        size, fmt = self.type._layout_info()
+        if size is None:
+            return None, None
+        return size * len(self), repeat_format(fmt, len(self))
+
 
 class Vector(_Sequence, VLA):
 
@@ -171,39 +354,130 @@ class Vector(_Sequence, VLA):
 
         # This assumes that the Struct will update the length field's value
         self.length = len(value)
+        self._changed()
 
-    def from_bytes(self, data: bytes):
-        if isinstance(self.type, Field):
-            return super().from_bytes(data[:len(self) * len(self.type)])
-        else:
-            val = []
-            for _ in range(len(self)):
-                next_obj = self.type.from_bytes(data)
-                val.append(next_obj)
-                data = data[len(bytes(next_obj)):]
-            self.value = val
-            return self
+    def _resized(self):
+        self.length = len(self.data)
 
     def __len__(self) -> int:
         return VLA.__len__(self)
 
 
-class IPv4(Array):
-    def __init__(self, value: str = '0.0.0.0'):
-        super().__init__(field_type=UInt8(), length=4, value=value)
+class Bytes(Field):
+    """
+    Raw bytes of a constant length. The value is a bytes-like object, and is serialized as-is.
+    When deserializing, the value is a memoryview of the raw data (so it isn't copied).
+    Without a length, the value may have any length, and deserializing consumes the rest of the data.
+    """
 
-    @_Sequence.value.setter
-    def value(self, value: str):
-        if isinstance(value, str):
-            x = value.split('.')
-        else:
-            x = tuple(iter(value))
-        if len(x) != 4:
-            raise ValueError('IP length mismatch. Expected 4, got {}'.format(len(x)))
-        self.data = list(int(z) for z in x)
+    def __init__(self, length: Optional[int] = None, value: Optional[bytes] = None,
+                 validator: Optional[ValidatorType] = None):
+        self.length = length
+        self.validator = as_validator(validator)
+        self.value = bytes(length or 0) if value is None else value
 
-    def __str__(self):
-        return '.'.join(str(x) for x in self.value)
+    @property
+    def validator(self) -> ValidatorABC:
+        return self._validator
+
+    @validator.setter
+    def validator(self, value: ValidatorABC):
+        self._validator = value
+
+    @property
+    def value(self) -> Union[bytes, memoryview]:
+        return self._value
+
+    @value.setter
+    def value(self, value: Union[bytes, bytearray, memoryview]):
+        self._value = self._as_bytes_like(value)
+        if self.length is not None and len(self._value) != self.length:
+            raise ValueError('Value length ({}) does not match the length of {} ({})'.format(
+                len(self._value), self.__class__.__qualname__, len(self)))
+        touch(self)
+
+    def _as_bytes_like(self, value) -> Union[bytes, memoryview]:
+        if isinstance(value, memoryview):
+            # Make sure that the length of the memoryview is in bytes
+            return value if value.format == 'B' and value.ndim == 1 else value.cast('B')
+        if isinstance(value, bytes):
+            return value
+        # Copy other values (e.g. a bytearray, that might be changed later)
+        return bytes(value)
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        # Decoded values are memoryviews of the decoded data, which can't be copied or pickled
+        if isinstance(state.get('_value'), memoryview):
+            state['_value'] = bytes(state['_value'])
+        return state
+
+    def __repr__(self) -> str:
+        return '{}({}, {!r})'.format(self.__class__.__qualname__, len(self), bytes(self._value))
+
+    def __str__(self) -> str:
+        return '{}({!r})'.format(self.__class__.__qualname__, bytes(self._value))
+
+    def __len__(self) -> int:
+        return len(self._value) if self.length is None else self.length
+
+    def __bytes__(self) -> bytes:
+        return bytes(self._value)
+
+    def iter_buffers(self):
+        # The value is passed by reference, it's only copied if it's small enough to be joined with other fields
+        yield self._value
+
+    def from_bytes(self, data: bytes):
+        self.decode(data)
+        return self
+
+    def decode(self, data: bytes, offset: int = 0) -> int:
+        if self.length is None:
+            self.value = memoryview(data)[offset:]
+            return len(self._value)
+
+        size = len(self)
+        value = memoryview(data)[offset:offset + size]
+        if len(value) != size:
+            raise ValueError('Expected {} bytes for {}, got {}'.format(size, self.__class__.__qualname__, len(value)))
+        self.value = value
+        return size
+
+    def _decode_steps(self):
+        if self.length is None:
+            raise TypeError(f"{self.__class__.__qualname__} without a length can't be decoded incrementally")
+        yield from super()._decode_steps()
+
+    def _layout_info(self):
+        if self.length is None:
+            return None, None
+        return len(self), '={}s'.format(len(self))
+
+
+class Blob(Bytes, VLA):
+    """
+    Raw bytes of a variable length, the length is stored in another field (like a Vector).
+    """
+
+    def __init__(self, length: Union[_IntScalar, str], value: bytes = b'', validator: Optional[ValidatorType] = None):
+        VLA.__init__(self, length)
+        self.validator = as_validator(validator)
+        self.value = value
+
+    @Bytes.value.setter
+    def value(self, value: Union[bytes, bytearray, memoryview]):
+        self._value = self._as_bytes_like(value)
+
+        # This assumes that the Struct will update the length field's value
+        self.length = len(self._value)
+        touch(self)
+
+    def __len__(self) -> int:
+        return VLA.__len__(self)
+
+    def _layout_info(self):
+        return None, None
 
 
 def byte_chunks(x: bytes, chunk_size: int):
@@ -0,0 +1,43 @@
+import ipaddress
+
+import pytest
+
+import hydration as h
+
+
+class Flow(h.Struct):
+    src = h.IPv4()
+    dst = h.IPv6()
+    port = h.UInt16()
+
+
+def test_ipv4():
+    ip = h.IPv4('10.0.0.1')
+    assert bytes(ip) == ip.packed == b'\n\x00\x00\x01'
+    assert ip.address == ipaddress.IPv4Address('10.0.0.1')
+    assert ip == h.IPv4(b'\n\x00\x00\x01') == h.IPv4((10, 0, 0, 1)) == h.IPv4(0x0A000001) == '10.0.0.1'
+
+    with pytest.raises(ValueError):
+        h.IPv4('10.0.0')
+
+    with pytest.raises(ValueError):
+        h.IPv4('10.0.0.256')
+
+
+def test_ipv6():
+    ip = h.IPv6('fe80::1')
+    assert len(bytes(ip)) == 16
+    assert str(ip) == 'fe80::1'
+    assert ip.address == ipaddress.IPv6Address('fe80::1')
+
+    with pytest.raises(ValueError):
+        h.IPv6('fe80::1::2')
+
+
+def test_addresses_in_struct():
+    flow = Flow(src='192.168.1.1', dst='2001:db8::1', port=80)
+    assert Flow.from_bytes(bytes(flow)) == flow
+    assert Flow.layout.size == 22
+
+    with pytest.raises(ValueError):
+        Flow.from_bytes(bytes(flow)[:3])
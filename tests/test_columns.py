@@ -0,0 +1,70 @@
+import array
+
+import pytest
+
+import hydration as h
+
+
+class Record(h.Struct, endianness=h.LittleEndian):
+    opcode = h.UInt8()
+    port = h.UInt16()
+    value = h.Double()
+    flags = h.Array(3, h.UInt8, fill=True)
+    src = h.IPv4()
+
+
+records = [Record(opcode=i % 3, port=1000 + i, value=i / 2, flags=[i, i + 1, i + 2], src=f'10.0.0.{i}')
+           for i in range(5)]
+data = b''.join(map(bytes, records))
+
+
+def test_decode_columns():
+    columns = Record.decode_columns(data)
+    assert list(columns) == ['opcode', 'port', 'value', 'flags', 'src']
+    assert columns['port'] == array.array('H', range(1000, 1005))
+    assert columns['value'].tolist() == [r.value.value for r in records]
+    assert columns['flags'][1] == (1, 2, 3)
+    assert columns['src'][2] == b'\x0a\x00\x00\x02'
+
+    assert Record.decode_columns(data, fields=['port', 'opcode']) == {'port': columns['port'],
+                                                                      'opcode': columns['opcode']}
+    assert Record.decode_columns(b'', fields=['port']) == {'port': array.array('H')}
+
+    with pytest.raises(ValueError):
+        Record.decode_columns(data[:-1])
+    with pytest.raises(AttributeError):
+        Record.decode_columns(data, fields=['nope'])
+
+
+def test_decode_columns_byte_orders():
+    class Mixed(h.Struct):
+        big = h.UInt32(endianness=h.BigEndian)
+        little = h.Int16(endianness=h.LittleEndian)
+        native = h.Float()
+
+    mixed = [Mixed(big=i * 1000, little=-i, native=i / 4) for i in range(4)]
+    columns = Mixed.decode_columns(b''.join(map(bytes, mixed)))
+    assert columns['big'].tolist() == [0, 1000, 2000, 3000]
+    assert columns['little'].tolist() == [0, -1, -2, -3]
+    assert columns['native'].tolist() == [0, 0.25, 0.5, 0.75]
+
+
+def test_encode_columns():
+    assert Record.encode_columns(Record.decode_columns(data)) == data
+
+    encoded = Record.encode_columns({'port': [1, 2]})
+    assert [Record.from_bytes(encoded[i:i + len(Record)]) for i in (0, len(Record))] == [Record(port=1),
+                                                                                         Record(port=2)]
+    with pytest.raises(ValueError):
+        Record.encode_columns({'port': [1, 2], 'opcode': [1]})
+    with pytest.raises(ValueError):
+        Record.encode_columns({'port': [-1]})
+
+
+def test_variable_size():
+    class Variable(h.Struct):
+        length = h.UInt8()
+        data = h.Vector(length)
+
+    with pytest.raises(TypeError):
+        Variable.decode_columns(b'')
@@ -0,0 +1,54 @@
+import ctypes
+
+import pytest
+
+import hydration as h
+
+
+class Inner(h.Struct, endianness=h.BigEndian):
+    a = h.UInt16()
+    b = h.Int8()
+
+
+class Outer(h.Struct, endianness=h.BigEndian):
+    x = h.UInt32(5)
+    inner = Inner
+    values = h.Array(3, h.UInt16(endianness=h.BigEndian), fill=True)
+    src = h.IPv4('1.2.3.4')
+    ratio = h.Double(1.5)
+    inners = h.Array(2, Inner, fill=True)
+
+
+def test_ctypes_type():
+    c_outer = Outer.ctypes_type
+    assert issubclass(c_outer, ctypes.BigEndianStructure)
+    assert ctypes.sizeof(c_outer) == len(Outer)
+    assert Outer.ctypes_type is c_outer
+
+    outer = Outer(values=[1, 2, 3])
+    outer.inner.a = 0x102
+    buffer = bytearray(bytes(outer))
+
+    # Fields are accessed in the buffer itself
+    view = c_outer.from_buffer(buffer)
+    assert (view.x, view.inner.a, list(view.values), bytes(view.src), view.ratio) == (5, 0x102, [1, 2, 3],
+                                                                                   b'\x01\x02\x03\x04', 1.5)
+    view.inners[1].a = 7
+    assert Outer.from_bytes(buffer).inners[1].a == 7
+
+    assert Outer.from_ctypes(view) == Outer.from_bytes(buffer)
+    assert bytes(outer.to_ctypes()) == bytes(outer)
+
+
+def test_no_ctypes_type():
+    class Variable(h.Struct):
+        length = h.UInt8()
+        data = h.Vector(length)
+
+    class Mixed(h.Struct):
+        a = h.UInt16(endianness=h.BigEndian)
+        b = h.UInt16(endianness=h.LittleEndian)
+
+    for struct_class in (Variable, Mixed):
+        with pytest.raises(TypeError):
+            struct_class.ctypes_type
@@ -0,0 +1,124 @@
+import pytest
+
+import hydration as h
+
+
+class Element(h.Struct):
+    a = h.UInt16()
+
+
+class Packet(h.Struct, endianness=h.BigEndian):
+    count = h.UInt8()
+    items = h.Vector(count, Element)
+    length = h.UInt16()
+    blob = h.Blob(length)
+
+
+def test_fragmented():
+    packet = Packet(items=[Element(a=i) for i in range(5)], blob=b'hello world')
+    data = bytes(packet) * 3
+    decoder = h.Decoder(Packet)
+
+    # Feed one byte at a time, so decoding is resumed in the middle of fields and vectors
+    results = []
+    for i in range(len(data)):
+        results.extend(decoder.feed(data[i:i + 1]))
+    assert results == [packet] * 3
+    assert bytes(results[-1].blob) == b'hello world'
+    assert decoder.buffered == 0
+
+    # Several objects (and a part of another one) in a single chunk
+    assert decoder.feed(data + data[:4]) == [packet] * 3
+    assert decoder.buffered == 1
+    assert decoder.feed(data[4:len(bytes(packet))]) == [packet]
+
+
+class Body1(h.Struct):
+    x = h.UInt32(7)
+
+
+class Body2(h.Struct):
+    y = h.UInt8(9)
+
+
+class Header(h.Struct):
+    opcode = h.OpcodeField(h.UInt8, {Body1: 1, Body2: 2})
+
+
+def test_dispatch():
+    decoder = h.Decoder(Header)
+    first, second = decoder.feed(bytes(Header() / Body1()) + bytes(Header() / Body2()))
+    assert isinstance(first, h.Message)
+    assert first[Body1].x == 7
+    assert second[Body2].y == 9
+
+    with pytest.raises(ValueError):
+        decoder.feed(b'\x03')
+
+    decoder = h.Decoder(Header, dispatch={1: Body2})
+    assert decoder.feed(b'\x01\x05')[0][Body2].y == 5
+
+    with pytest.raises(ValueError):
+        h.Decoder(Body1, dispatch={1: Body2})
+
+
+class FrameHeader(h.Struct, endianness=h.BigEndian):
+    magic = h.UInt16(0xCAFE)
+    length = h.InclusiveLengthField(h.UInt16)
+
+
+def test_frame_splitter():
+    frames = [bytes(FrameHeader() / bytes(range(n))) for n in (0, 3, 10)]
+    stream = b''.join(frames)
+    splitter = h.FrameSplitter(FrameHeader)
+
+    assert [bytes(frame) for frame in splitter.feed(stream)] == frames
+
+    # Fragmented frames
+    result = []
+    for i in range(0, len(stream), 5):
+        result.extend(splitter.feed(stream[i:i + 5]))
+    assert [bytes(frame) for frame in result] == frames
+    assert splitter.buffered == 0
+
+    # Complete frames aren't copied
+    frame = splitter.feed(stream)[1]
+    assert frame.obj is stream
+
+    with pytest.raises(ValueError):
+        h.FrameSplitter(FrameHeader, max_size=8).feed(stream)
+    with pytest.raises(ValueError):
+        splitter.feed(bytes(FrameHeader(length=1)))
+
+
+def test_frame_splitter_large_frame():
+    class Header(h.Struct):
+        length = h.InclusiveLengthField(h.UInt32)
+
+    class Frame(h.Struct):
+        payload = h.Bytes(100000)
+
+    frame = bytes(Header() / Frame(payload=bytes(range(256)) * 390 + bytes(160)))
+    stream = frame * 2 + frame[:10]
+    splitter = h.FrameSplitter(Header)
+
+    result = []
+    for i in range(0, len(stream), 7):
+        result.extend(splitter.feed(stream[i:i + 7]))
+    assert [bytes(f) for f in result] == [frame, frame]
+    assert splitter.buffered == 10
+
+    # Every byte of an incomplete frame is copied once, so this takes linear time
+    splitter.reset()
+    stream = memoryview(frame * 20)
+    assert sum(len(splitter.feed(stream[i:i + 64])) for i in range(0, len(stream), 64)) == 20
+
+
+def test_frame_splitter_exclusive():
+    class Header(h.Struct):
+        length = h.ExclusiveLengthField(h.UInt8)
+
+    assert [bytes(f) for f in h.FrameSplitter(Header).feed(b'\x02ab\x00\x01c')] == [b'\x02ab', b'\x00', b'\x01c']
+
+    with pytest.raises(ValueError):
+        h.FrameSplitter(Packet)
@@ -0,0 +1,36 @@
+import pytest
+
+import hydration as h
+
+
+class Record(h.Struct):
+    x = h.UInt8()
+    values = h.Array(16, fill=True)
+
+
+def test_memory_report():
+    report = h.memory_report(Record)
+    assert list(report.parts) == ['x', 'values', 'overhead']
+    assert report.total == sum(report.parts.values())
+    assert report.wire_size == 17
+    # An Array holds a list of its' values, and a copy of its' type
+    assert report.parts['values'] > report.parts['x']
+
+    report = h.memory_report(Record() / b'abc')
+    assert list(report.parts) == ['0: Record', '1: bytes', 'overhead']
+    assert report.wire_size == 20
+
+    with pytest.raises(TypeError):
+        h.memory_report(3)
+
+
+def test_track_allocations():
+    data = bytes(Record(x=3))
+    with h.track_allocations() as allocations:
+        records = [Record.from_bytes(data) for _ in range(10)]
+        bytes(records[0])
+
+    assert allocations.calls[Record, 'from_bytes'] == 10
+    assert allocations.calls[Record, 'serialize'] == 1
+    assert allocations.allocated[Record, 'from_bytes'] > 0
+    assert 'Record.from_bytes' in str(allocations)
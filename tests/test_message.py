@@ -1,8 +1,10 @@
+import socket
 from zlib import crc32
 
 import pytest
 
 import hydration as h
+from hydration import checksums
 
 
 class Tomer(h.Struct):
@@ -42,6 +44,48 @@ def test_message():
     assert x[-1].b == 124
 
 
+def test_layer_index():
+    class Base(h.Struct):
+        pass
+
+    class Derived(Base):
+        pass
+
+    first, second = Base(), Derived()
+    x = first / Tomer() / second
+    assert x.index(Base) == 0
+    assert x.index((Base, 1)) == 2
+    assert x.index(Derived) == 2
+    assert x.index(second) == 2
+    assert h.Struct in x and Base in x
+
+    with pytest.raises(KeyError):
+        x.index((Base, 2))
+    with pytest.raises(KeyError):
+        x.index(Lior)
+
+    # Replacing and adding layers updates the index
+    x[Tomer] = Lior()
+    assert Tomer not in x
+    assert x.index(Lior) == 1
+    x.layers.append(Tomer())
+    assert x.index(Tomer) == 3
+    x.layers = [second]
+    assert first not in x
+    assert x.index(Base) == 0
+
+    # Changes that keep the number of layers update the index as well
+    x = Base() / Tomer()
+    assert x.index(Tomer) == 1
+    x.layers[1] = Lior()
+    assert Tomer not in x
+    assert isinstance(x[Lior], Lior)
+    x.layers.insert(0, Tomer())
+    x.layers.pop()
+    assert x.index(Base) == 1
+    assert x.index(Tomer) == 0
+
+
 def test_bytes_suffix():
     x = Tomer() / Lior() / b'test'
     assert bytes(x) == b''.join((bytes(Tomer()), bytes(Lior()), b'test'))
@@ -153,3 +197,115 @@ class Footer(h.Struct, endianness=h.BigEndian):
 def test_crc():
     msg = Header(magic=0x01052000) / Footer()
     assert crc32(bytes(msg)[:-4]) == msg[Footer].crc.value
+
+
+def test_iter_buffers():
+    class Data(h.Struct, endianness=h.BigEndian):
+        length = h.UInt32()
+        payload = h.Blob(length)
+
+    payload = bytes(range(256)) * 64
+    trailer = b'\xff' * 4096
+    msg = Header() / Data(payload=payload) / b'end' / trailer
+
+    buffers = list(msg.iter_buffers())
+    assert b''.join(buffers) == bytes(msg)
+    # The small fields are joined, and the large payloads aren't copied
+    assert len(buffers) == 4
+    assert buffers[1] is msg[Data].payload.value
+    assert buffers[3] is trailer
+
+    left, right = socket.socketpair()
+    with left, right:
+        assert h.sendmsg(left, msg) == len(bytes(msg))
+        received = b''
+        while len(received) < len(bytes(msg)):
+            received += right.recv(65536)
+        assert received == bytes(msg)
+
+
+class IPHeader(h.Struct, endianness=h.BigEndian):
+    version = h.UInt8(0x45)
+    length = h.InclusiveLengthField(h.UInt16)
+    checksum = h.ChecksumField(h.UInt16, checksums.INTERNET)
+
+
+class Trailer(h.Struct, endianness=h.BigEndian):
+    crc = h.ChecksumField(h.UInt32, scope='preceding')
+
+
+class Payload(h.Struct):
+    data = h.Bytes(8)
+
+
+def test_checksum_field():
+    msg = IPHeader() / b'payload!' / Trailer()
+    data = bytes(msg)
+
+    # The header's checksum is computed over the header (with a zero checksum field)
+    header = data[:3] + bytes(3)
+    total = sum(int.from_bytes(header[i:i + 2], 'big') for i in range(0, 6, 2))
+    assert msg[IPHeader].checksum == ~((total & 0xFFFF) + (total >> 16)) & 0xFFFF
+
+    # The trailer covers everything before it (including the header's checksum)
+    assert msg[Trailer].crc == crc32(data[:-4])
+
+    decoded = h.Message.from_bytes(data, IPHeader, bytes)
+    assert decoded[IPHeader].checksum == msg[IPHeader].checksum
+    assert h.Message.from_bytes(data, IPHeader, Payload, Trailer)[Trailer].crc == crc32(data[:-4])
+
+    corrupted = data[:6] + b'P' + data[7:]
+    with pytest.raises(ValueError):
+        h.Message.from_bytes(corrupted, IPHeader, Payload, Trailer)
+    # Data that's left after the layers is invalid
+    with pytest.raises(ValueError):
+        h.Message.from_bytes(data, IPHeader, Payload)
+
+
+def test_nested_checksums():
+    class Outer(h.Struct):
+        crc = h.ChecksumField(h.UInt32, scope='following')
+
+    class Inner(h.Struct, endianness=h.BigEndian):
+        data = h.UInt16(0x1234)
+        checksum = h.ChecksumField(h.UInt16, checksums.INTERNET)
+
+    # The inner checksum is computed first, so the outer one covers its' final value
+    msg = Outer() / Inner()
+    data = bytes(msg)
+    assert bytes(msg) == data
+    assert msg[Outer].crc == crc32(data[4:])
+    assert h.Message.from_bytes(data, Outer, Inner)[Inner].checksum == 0xEDCB
+
+    class Other(h.Struct):
+        crc = h.ChecksumField(h.UInt32, scope='message')
+
+    with pytest.raises(ValueError):
+        bytes(Other() / Other())
+
+
+def test_custom_checksum():
+    class Sum(h.Struct):
+        total = h.ChecksumField(h.UInt8, lambda data: sum(data) % 256, scope='following')
+
+    assert bytes(Sum() / b'\x01\x02\x03') == b'\x06\x01\x02\x03'
+    with pytest.raises(ValueError):
+        h.ChecksumField(h.UInt8, scope='nope')
+
+
+def test_batch():
+    class Header(h.Struct):
+        length = h.InclusiveLengthField(h.UInt16)
+
+    class Body(h.Struct):
+        count = h.UInt8()
+        values = h.Vector(count, h.UInt8)
+
+    msg = Header() / Body()
+    with msg.batch():
+        msg.layers[1].values = [1, 2, 3]
+        msg.layers.append(b'tail')
+        msg[Header] = Header()
+        assert msg[Header].length == 0
+    assert msg[Body].count == 3
+    assert msg[Header].length == len(bytes(msg)) == 10
@@ -0,0 +1,54 @@
+import pytest
+
+import hydration as h
+
+
+class Item(h.Struct):
+    a = h.UInt16()
+    b = h.UInt8()
+
+
+class Header(h.Struct, endianness=h.BigEndian):
+    opcode = h.UInt8(validator=range(10))
+    count = h.UInt8()
+    items = h.Vector(count, Item)
+    length = h.UInt16()
+    blob = h.Blob(length)
+    src = h.IPv4()
+    port = h.UInt16()
+
+
+header = Header(opcode=7, items=[Item(a=i) for i in range(3)], blob=b'abc', src='1.2.3.4', port=80)
+data = bytes(header)
+
+
+def test_projection():
+    result = Header.from_bytes(data, fields=('opcode', 'src', 'port'))
+    assert result == (7, '1.2.3.4', 80)
+    assert result.port == 80
+
+    projection = Header.projection('items', 'blob')
+    assert Header.projection('items', 'blob') is projection
+    result = projection(data)
+    assert result.items == header.items.value
+    assert bytes(result.blob) == b'abc'
+
+    # Invalid values and missing data are still detected
+    with pytest.raises(ValueError):
+        Header.from_bytes(bytes(h.UInt8(10)) + data[1:], fields=('opcode',))
+    with pytest.raises(ValueError):
+        Header.from_bytes(data[:-1], fields=('port',))
+    with pytest.raises(AttributeError):
+        Header.projection('nope')
+
+
+def test_projection_with_hooks():
+    class Hooked(h.Struct):
+        kind = h.UInt8()
+        body = h.FieldPlaceholder()
+
+        @h.from_bytes_hook(body)
+        def set_body(self):
+            self.body = h.UInt16() if self.kind == 2 else h.UInt8()
+
+    assert Hooked.from_bytes(b'\x02\x01\x00', fields=('body',)).body == 1
@@ -0,0 +1,72 @@
+import array
+
+import pytest
+
+import hydration as h
+
+
+class Point(h.Struct, endianness=h.LittleEndian):
+    ts = h.UInt32()
+    coords = h.Array(2, h.Int16, fill=True)
+    src = h.IPv4()
+
+
+class Variable(h.Struct):
+    length = h.UInt8()
+    data = h.Vector(length)
+
+
+def test_struct_array():
+    points = h.StructArray(Point, 3)
+    assert len(points) == 3
+    assert bytes(points) == bytes(Point()) * 3
+
+    points[1].ts = 7
+    points[2].coords = [1, -1]
+    points[2].src = '1.2.3.4'
+    assert points[1].ts == 7
+    assert points[2].coords == [1, -1]
+    assert points[2].to_struct() == Point(coords=[1, -1], src='1.2.3.4')
+
+    with pytest.raises(ValueError):
+        points[0].ts = -1
+    with pytest.raises(AttributeError):
+        points[0].nope = 1
+
+    points.append(Point(ts=9))
+    points.extend([bytes(Point(ts=10)), Point(ts=11)])
+    assert points['ts'] == array.array('I', [0, 7, 0, 9, 10, 11])
+
+    # Slices share the buffer
+    odd = points[1::2]
+    assert [p.ts for p in odd] == [7, 9, 11]
+    odd[0].ts = 8
+    assert points[1].ts == 8
+    assert odd['ts'] == [8, 9, 11]
+    with pytest.raises(TypeError):
+        odd.append(Point())
+
+    points[0] = Point(ts=1)
+    assert h.StructArray(Point, data=bytes(points)) == points
+
+    with pytest.raises(ValueError):
+        points.append(b'\x00')
+    with pytest.raises(TypeError):
+        h.StructArray(Variable)
+
+
+def test_slice_assignment():
+    points = h.StructArray(Point, 4)
+    points[1:3] = [Point(ts=1), bytes(Point(ts=2))]
+    assert list(points['ts']) == [0, 1, 2, 0]
+
+    # Slices of slices and steps are relative to the slice
+    view = points[::2]
+    view[1:] = [Point(ts=5)]
+    assert list(points['ts']) == [0, 1, 5, 0]
+
+    with pytest.raises(ValueError):
+        points[0:2] = [Point()]
+    with pytest.raises(TypeError):
+        points[0:1] = [Variable()]
+    assert list(points['ts']) == [0, 1, 5, 0]
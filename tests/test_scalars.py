@@ -57,3 +57,25 @@ def test_comparisons():
     assert h.UInt16(3) > h.UInt16(2)
     assert h.UInt16(3) == h.UInt16(3)
     assert h.UInt16(4) == h.UInt8(4)
+
+
+class Perm(enum.IntFlag):
+    r = 4
+    w = 2
+    x = 1
+
+
+def test_enum_lookup():
+    d = Dar()
+    d.d = 2
+    assert d.d.member is Guy.b
+    assert d.d.name == 'b'
+    assert Dar.from_bytes(bytes(d)).d.member is Guy.b
+
+    with pytest.raises(ValueError):
+        Dar.from_bytes(bytes(h.UInt32(7)))
+
+    # Values that aren't members are still validated by the enum class
+    flags = h.Enum(h.UInt8, Perm, Perm.r | Perm.w)
+    assert flags.value == 6
+    assert flags.member == Perm.r | Perm.w
@@ -0,0 +1,50 @@
+import pytest
+
+import hydration as h
+
+
+class Packet(h.Struct, endianness=h.BigEndian):
+    opcode = h.UInt8()
+    port = h.UInt16()
+    src = h.IPv4()
+
+
+packets = [Packet(opcode=i % 4, port=900 + i * 50, src=f'10.0.0.{i}') for i in range(10)]
+capture = b''.join(map(bytes, packets))
+
+
+def test_scan():
+    assert list(Packet.scan(capture)) == packets
+
+    where = {'opcode': 2, 'port': range(1000, 2000)}
+    assert list(Packet.scan(capture, where=where)) == [p for p in packets
+                                                       if p.opcode == 2 and 1000 <= p.port < 2000]
+
+    assert list(Packet.scan(capture, where={'opcode': {1, 3}, 'src': h.FunctionValidator(lambda x: x < '10.0.0.5')})) \
+        == [packets[1], packets[3]]
+
+    views = list(Packet.scan(capture, where={'src': '10.0.0.7'}, decode=False))
+    assert [bytes(view) for view in views] == [bytes(packets[7])]
+
+    # Invalid arguments are found before iterating
+    with pytest.raises(AttributeError):
+        Packet.scan(capture, where={'nope': 1})
+    with pytest.raises(ValueError):
+        Packet.scan(capture[:-1])
+
+
+def test_scan_mixed_byte_orders():
+    class Mixed(h.Struct):
+        big = h.UInt16(endianness=h.BigEndian)
+        little = h.UInt16(endianness=h.LittleEndian)
+
+    records = [Mixed(big=i, little=i * 2) for i in range(10)]
+    data = b''.join(map(bytes, records))
+    assert list(Mixed.scan(data, where={'big': range(3, 6), 'little': {6, 10}})) == [records[3], records[5]]
+
+
+def test_is_valid():
+    assert h.RangeValidator(range(3)).is_valid(2)
+    assert not h.SetValidator({1, 2}).is_valid(3)
+    assert not h.ExactValueValidator(3).is_valid(4)
+    assert h.FunctionValidator(lambda x: x > 3).is_valid(4)
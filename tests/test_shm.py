@@ -0,0 +1,113 @@
+import multiprocessing
+
+import pytest
+
+import hydration as h
+from hydration.shm import RingBuffer
+
+pytest.importorskip('multiprocessing.shared_memory')
+
+
+class Record(h.Struct):
+    ts = h.UInt32()
+    kind = h.UInt8()
+
+
+class Packet(h.Struct):
+    length = h.UInt8()
+    data = h.Blob(length)
+
+
+def consume(ring, results):
+    with ring:
+        results.put([record.ts.value for record in ring])
+
+
+def test_fixed_size():
+    ring = RingBuffer(Record, 3)
+    try:
+        assert all(ring.push(Record(ts=i, kind=i + 1)) for i in range(3))
+        assert not ring.push(Record())
+        assert len(ring) == 3
+
+        assert ring.pop() == Record(ts=0, kind=1)
+        with ring.read() as record:
+            assert record.ts == 1
+            record.kind = 7
+        assert ring.pop(decode=False) == bytes(Record(ts=2, kind=3))
+        assert ring.pop() is None
+
+        # Slots are reused
+        ring.push(Record(ts=3))
+        with ring.read() as record:
+            assert record.to_struct() == Record(ts=3)
+        with ring.read() as record:
+            assert record is None
+
+        with pytest.raises(TypeError):
+            ring.push(Packet())
+    finally:
+        ring.close()
+        ring.unlink()
+
+
+def test_record_size():
+    class Samples(h.Struct):
+        ts = h.UInt32()
+        values = h.Array(2, h.UInt8)
+
+    class Extended(Samples):
+        extra = h.UInt64()
+
+    with RingBuffer(Samples, 2) as ring:
+        try:
+            # Records that are larger than a slot would overwrite the next slot
+            with pytest.raises(TypeError):
+                ring.push(Extended())
+            samples = Samples()
+            samples.ts = h.UInt64()
+            with pytest.raises(ValueError):
+                ring.push(samples)
+            assert len(ring) == 0
+
+            assert ring.push(Samples(ts=1, values=[2, 3]))
+            assert ring.pop() == Samples(ts=1, values=[2, 3])
+        finally:
+            ring.unlink()
+
+
+def test_variable_size():
+    with pytest.raises(ValueError):
+        RingBuffer(Packet, 2)
+
+    ring = RingBuffer(Packet, 2, slot_size=10)
+    try:
+        with pytest.raises(ValueError):
+            ring.push(Packet(data=b'x' * 10))
+        ring.push(Packet(data=b'abc'))
+        ring.push(Packet(data=b''))
+
+        with ring.read() as record:
+            assert bytes(record) == b'\x03abc'
+        assert list(ring) == [Packet(data=b'')]
+    finally:
+        ring.close()
+        ring.unlink()
+
+
+def test_processes():
+    ring = RingBuffer(Record, 100)
+    try:
+        for i in range(100):
+            ring.push(Record(ts=i))
+
+        context = multiprocessing.get_context('spawn')
+        results = context.Queue()
+        process = context.Process(target=consume, args=(ring, results))
+        process.start()
+        assert results.get(timeout=30) == list(range(100))
+        process.join()
+        assert len(ring) == 0
+    finally:
+        ring.close()
+        ring.unlink()
@@ -1,3 +1,9 @@
+import copy
+import enum
+import pickle
+import sys
+import threading
+
 import pytest
 import hydration as h
 
@@ -162,3 +168,233 @@ def test_from_bytes_hooks():
     r2 = Ronen.from_bytes(bytes(r))
 
     assert r2.arr == list(range(10))
+
+
+def test_cached_bytes():
+    class Inner(h.Struct):
+        x = h.UInt16(7)
+
+    class Heartbeat(h.Struct, cached=True):
+        seq = h.UInt32()
+        inner = Inner()
+        vec_len = h.UInt8()
+        vec = h.Vector(vec_len, Inner)
+
+    hb = Heartbeat(vec=[Inner(), Inner()])
+    data = bytes(hb)
+    assert bytes(hb) is data
+
+    hb.seq = 5
+    assert bytes(hb) == bytes(Heartbeat(seq=5, vec=[Inner(), Inner()]))
+
+    # Changes of nested Structs and sequences are tracked by their parents
+    hb.inner.x = 8
+    hb.vec[1].x = 9
+    hb.vec.append(Inner(x=10))
+    hb.vec_len = 3
+    expected = Heartbeat(seq=5, inner=Inner(x=8), vec=[Inner(), Inner(x=9), Inner(x=10)])
+    assert bytes(hb) == bytes(expected)
+    assert Heartbeat.from_bytes(bytes(hb)) == expected
+
+    # Replacing the value of a Struct invalidates its' caches
+    class Cached(h.Struct, cached=True):
+        x = h.UInt8()
+
+    cached = Cached()
+    cached.x = 5
+    cached.x = 6
+    assert bytes(cached) == b'\x06' and len(cached) == 1
+    cached.value = Cached(x=7)
+    assert bytes(cached) == b'\x07'
+
+
+def test_cached_meta_fields():
+    class Color(enum.IntEnum):
+        RED = 1
+        GREEN = 2
+
+    class Header(h.Struct, cached=True):
+        a = h.UInt8()
+        length = h.InclusiveLengthField(h.UInt16)
+        opcode = h.OpcodeField(h.UInt8, {})
+        color = h.Enum(h.UInt8, Color)
+
+    header = Header()
+    assert bytes(header) == b'\x00\x00\x00\x00\x01'
+
+    # Decoding into MetaFields (in-place) invalidates the cached bytes
+    header.update_from_bytes(b'\x01\x05\x00\x07\x02')
+    assert header.length.value == 5 and header.opcode.value == 7
+    assert bytes(header) == b'\x01\x05\x00\x07\x02'
+
+    # So does setting the scalars of MetaFields and Enums directly, in copies as well
+    header.length.data_field.value = 6
+    header.color.type.value = 1
+    assert bytes(header) == b'\x01\x06\x00\x07\x01'
+    copied = copy.deepcopy(header)
+    copied.color.type.value = 2
+    assert bytes(copied) == b'\x01\x06\x00\x07\x02'
+
+
+def test_update_from_bytes():
+    class Item(h.Struct):
+        a = h.UInt16()
+
+    class Record(h.Struct):
+        x = h.UInt32()
+        items_len = h.UInt8()
+        items = h.Vector(items_len, Item)
+
+    record = Record()
+    x_field = record.x
+    record.update_from_bytes(bytes(Record(x=1, items=[Item(a=1), Item(a=2)])))
+    assert record == Record(x=1, items=[Item(a=1), Item(a=2)])
+    assert record.x is x_field
+
+    first_item = record.items[0]
+    assert Record.from_bytes(bytes(Record(x=2, items=[Item(a=3)])), into=record) is record
+    assert record == Record(x=2, items=[Item(a=3)])
+    assert record.items[0] is first_item
+
+    with pytest.raises(TypeError):
+        Omri.from_bytes(bytes(Omri()), into=record)
+
+
+def test_lazy_finalize():
+    class Base(h.Struct, endianness=h.BigEndian):
+        x = h.UInt16
+
+    class Lazy(Base):
+        y = h.UInt32
+        vec_len = h.UInt8()
+        vec = h.Vector(vec_len)
+
+    assert '_definition' in vars(Lazy)
+    assert Lazy._field_names == ['x', 'y', 'vec_len', 'vec']
+
+    # Accessing a field of the class finalizes it
+    assert isinstance(Lazy.y, h.UInt32)
+    assert '_definition' not in vars(Lazy)
+    assert Lazy.vec.length_field_name == 'vec_len'
+
+    class Explicit(Base):
+        z = h.UInt8
+
+    Explicit.finalize()
+    assert '_definition' not in vars(Explicit)
+    assert Explicit.x.endianness_format == h.BigEndian.value
+    assert bytes(Explicit(x=1, z=2)) == b'\x00\x01\x02'
+
+
+def test_concurrent_finalize():
+    class Base(h.Struct):
+        x = h.UInt16
+
+    classes = [type(f'Derived{i}', (Base,), {'y': h.UInt8()}) for i in range(50)]
+    barrier = threading.Barrier(8)
+    errors = []
+
+    def use():
+        barrier.wait()
+        try:
+            for cls in classes:
+                assert bytes(cls(x=1, y=2)) == b'\x01\x00\x02'
+        except Exception as e:
+            errors.append(e)
+
+    # Switch threads often, so they're more likely to finalize the same class at the same time
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=use) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    assert not errors
+    assert all('_definition' not in vars(cls) for cls in classes)
+
+
+class Sample(h.Struct):
+    count = h.UInt8()
+    values = h.Vector(count, h.UInt32)
+
+    def __init__(self, default, *args, **kwargs):
+        super().__init__(default, *args, **kwargs)
+        self.values = [default]
+
+
+class TaggedMessage(h.Message):
+    pass
+
+
+def test_pickle():
+    sample = Sample(7)
+    sample.values = [1, 2, 3]
+
+    data = pickle.dumps(sample)
+    assert len(data) < 2 * len(bytes(sample)) + 100
+    restored = pickle.loads(data)
+    assert restored == sample
+    assert restored._init_args == (7,)
+    assert restored.from_bytes(bytes(sample)) == sample
+
+    msg = pickle.loads(pickle.dumps(Omri() / sample / b'tail'))
+    assert msg[Sample] == sample
+    assert bytes(msg) == bytes(Omri() / sample / b'tail')
+
+    # Copies are still made field by field
+    copied = copy.deepcopy(sample)
+    assert copied == sample
+    assert copied.values is not sample.values
+
+    # Pickled messages keep their class
+    tagged = pickle.loads(pickle.dumps(TaggedMessage(Omri(), sample)))
+    assert type(tagged) is TaggedMessage
+    assert tagged[Sample] == sample
+
+    # A shallow copy shares the fields, which still belong to the original
+    class Cached(h.Struct, cached=True):
+        count = h.UInt8()
+        values = h.Vector(count, h.UInt8)
+
+    original = Cached(values=[1])
+    assert bytes(original) == b'\x01\x01'
+    shallow = copy.copy(original)
+    assert shallow.values is original.values
+    original.values = [1, 2]
+    assert bytes(original) == b'\x02\x01\x02'
+
+
+def test_batch():
+    class Limited(h.Struct):
+        small = h.Array(2, h.UInt8, validator=range(10))
+
+    class Outer(h.Struct):
+        inner = Limited
+        sample = Sample(0)
+
+    outer = Outer()
+    with outer.batch():
+        # Invalid values are allowed until the batch ends
+        outer.inner.small = [20, 1]
+        outer.inner.small = [5, 1]
+        outer.sample.values = [1, 2, 3]
+        assert outer.sample.count == 1
+    assert outer.sample.count == 3
+    assert outer.inner.small == [5, 1]
+    assert outer.inner._batch is None
+
+    with pytest.raises(ValueError):
+        with outer.batch():
+            outer.inner.small = [20, 1]
+    assert outer._batch is None and outer.inner._batch is None
+
+    # Lengths are still updated when the batch is interrupted
+    with pytest.raises(KeyError):
+        with outer.batch():
+            outer.sample.values = [1]
+            raise KeyError
+    assert outer.sample.count == 1
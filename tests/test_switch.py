@@ -0,0 +1,178 @@
+import copy
+import pickle
+
+import pytest
+
+import hydration as h
+
+
+class Login(h.Struct):
+    user_id = h.UInt32()
+
+
+class Logout(h.Struct):
+    reason = h.UInt8()
+    name_len = h.UInt8()
+    name = h.Blob(name_len)
+
+
+class Packet(h.Struct):
+    kind = h.UInt8(1)
+    body = h.Switch(kind, {1: Login, 2: Logout, 3: h.UInt16(validator=range(100))}, default=h.Bytes)
+
+
+def test_select_by_discriminator():
+    packet = Packet()
+    assert isinstance(packet.body.value, Login)
+    assert bytes(packet) == b'\x01' + bytes(Login())
+
+    decoded = Packet.from_bytes(b'\x02\x07\x02ab')
+    assert decoded.body.value == Logout(reason=7, name=b'ab')
+    assert decoded.body.reason == 7
+
+    decoded = Packet.from_bytes(b'\x03\x05\x00')
+    assert decoded.body == 5
+    with pytest.raises(ValueError):
+        Packet.from_bytes(b'\x03\xff\x00')
+
+    # The default case consumes the rest of the data
+    decoded = Packet.from_bytes(b'\x09abc')
+    assert bytes(decoded.body) == b'abc'
+
+    # Decoding into the same case reuses the field
+    body = decoded.body.field
+    decoded.update_from_bytes(b'\x09def')
+    assert decoded.body.field is body
+
+    assert Packet.from_bytes(b'\x02\x07\x00', fields=('body',)).body.reason == 7
+    assert Packet.layout['body'].size is None
+
+
+def test_assign_case():
+    packet = Packet(body=Logout(reason=3))
+    assert packet.kind == 2
+    assert Packet.from_bytes(bytes(packet)) == packet
+
+    packet.body = Login(user_id=5)
+    assert packet.kind == 1
+    packet.body.user_id = 6
+    assert Packet.from_bytes(bytes(packet)).body.user_id == 6
+
+    packet.body = h.UInt16(7)
+    assert packet.kind == 3
+    packet.body = 8
+    assert bytes(packet) == b'\x03\x08\x00'
+
+    # Assigning the default doesn't select a discriminator
+    packet.kind = 4
+    packet.body = h.Bytes(value=b'xyz')
+    assert bytes(packet) == b'\x04xyz'
+
+
+def test_no_case():
+    class Strict(h.Struct):
+        kind = h.UInt8()
+        body = h.Switch('kind', {1: h.UInt8, 2: h.UInt16})
+
+    with pytest.raises(ValueError):
+        bytes(Strict())
+    with pytest.raises(ValueError):
+        Strict.from_bytes(b'\x03\x00')
+    assert Strict.from_bytes(b'\x02\x01\x00').body == 1
+    assert Strict.layout['body'].size is None
+
+
+def test_static_cases():
+    class Uniform(h.Struct):
+        kind = h.UInt8()
+        body = h.Switch(kind, {0: h.UInt16, 1: h.Int16})
+        after = h.UInt8()
+
+    assert Uniform.layout.size == 4
+    assert Uniform.layout['after'].offset == 3
+    assert Uniform.from_bytes(b'\x01\xff\xff\x02').body == -1
+
+
+def test_discriminator_in_sync():
+    packet = Packet(kind=2)
+    assert isinstance(packet.body.value, Logout)
+    assert Packet.from_bytes(bytes(packet)) == packet
+
+    packet = Packet()
+    packet.kind = 3
+    assert bytes(packet) == b'\x03\x00\x00'
+    # The case doesn't change when the discriminator is set to the same case
+    packet.body = 5
+    packet.kind = 3
+    assert packet.body == 5
+
+    packet.body.value = Logout(reason=1)
+    assert packet.kind == 2
+    assert Packet.from_bytes(bytes(packet)) == packet
+
+    with pytest.raises(ValueError):
+        packet.body = h.Bytes(value=b'x')
+
+    with packet.batch():
+        packet.kind = 1
+    assert isinstance(packet.body.value, Login)
+
+
+def test_discriminator_changed_through_its_field():
+    packet = Packet()
+    packet.kind.value = 2
+    assert isinstance(packet.body.value, Logout)
+    assert packet.body.key == 2
+    assert bytes(packet) == b'\x02' + bytes(Logout())
+
+    # Replacing the discriminator field selects the case of its' value
+    packet.kind = h.UInt8(3)
+    assert bytes(packet) == b'\x03\x00\x00'
+    packet.body = 7
+
+    # A case that was selected before reuses its' field
+    packet.kind.value = 1
+    packet.body.user_id = 9
+    packet.kind.value = 3
+    assert packet.body == 7
+    packet.kind.value = 1
+    assert packet.body.user_id == 9
+
+    class Cached(h.Struct, cached=True):
+        kind = h.UInt8(1)
+        body = h.Switch(kind, {1: h.UInt8, 2: h.UInt16})
+
+    cached = Cached()
+    assert bytes(cached) == b'\x01\x00'
+    cached.kind.value = 2
+    assert bytes(cached) == b'\x02\x00\x00'
+    cached.kind.value = 3
+    with pytest.raises(ValueError):
+        bytes(cached)
+
+
+def test_scalar_cases():
+    class Point(h.Struct):
+        x = h.Int16()
+        y = h.Int16(validator=range(10))
+
+    class Shape(h.Struct):
+        kind = h.UInt8()
+        body = h.Switch(kind, {1: Point, 2: h.UInt32})
+
+    shape = Shape.from_bytes(b'\x01\xff\xff\x02\x00')
+    assert shape.body.x == -1 and shape.body.y == 2
+    with pytest.raises(ValueError):
+        Shape.from_bytes(b'\x01\x00\x00\x20\x00')
+    with pytest.raises(ValueError):
+        Shape.from_bytes(b'\x01\x00\x00')
+
+    # Copies share the compiled cases
+    copied = copy.deepcopy(shape)
+    # noinspection PyProtectedMember
+    assert copied.body._compiled is shape.body._compiled
+    assert copied.body.value == shape.body.value and copied.body.field is not shape.body.field
+
+    # The compiled cases aren't pickled
+    packet = Packet.from_bytes(b'\x01\x05\x00\x00\x00')
+    assert pickle.loads(pickle.dumps(packet.body)).user_id == 5
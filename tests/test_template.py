@@ -0,0 +1,67 @@
+import pytest
+
+import hydration as h
+
+
+class Heartbeat(h.Struct, endianness=h.BigEndian):
+    magic = h.UInt32(0xDEADBEEF)
+    seq = h.UInt64()
+    ids = h.Array(3, h.UInt16, fill=True)
+    payload_len = h.UInt8()
+    payload = h.Vector(payload_len)
+    timestamp = h.Double()
+
+
+def test_layout():
+    layout = Heartbeat.layout
+    assert [f.offset for f in layout] == [0, 4, 12, 18, 19, None]
+    assert [f.size for f in layout] == [4, 8, 6, 1, None, 8]
+    assert layout.size is None
+
+    class Fixed(h.Struct, endianness=h.LittleEndian):
+        a = h.UInt8
+        b = h.UInt16
+        c = h.Array(2, h.UInt32(endianness=h.LittleEndian))
+
+    assert Fixed.layout.size == len(Fixed())
+    assert Fixed.layout.format == '<BH2I'
+
+
+def test_template():
+    hb = Heartbeat(payload=[1, 2, 3])
+    template = hb.as_template()
+    assert bytes(template) == bytes(hb)
+
+    template.set('seq', 42)
+    template.set('ids', [4, 5, 6])
+    hb.seq = 42
+    hb.ids = [4, 5, 6]
+    assert bytes(template) == bytes(memoryview(template)) == bytes(hb)
+    assert template.get('seq') == 42
+
+
+def test_template_refuses_variable_fields():
+    template = Heartbeat().as_template()
+
+    for name in ('payload_len', 'payload', 'timestamp'):
+        with pytest.raises(TypeError):
+            template.set(name, 1)
+
+    with pytest.raises(AttributeError):
+        template.set('nope', 1)
+
+    with pytest.raises(ValueError):
+        template.set('seq', -1)
+
+
+def test_template_of_replaced_field():
+    class Pair(h.Struct):
+        a = h.UInt8()
+        b = h.UInt8()
+
+    pair = Pair()
+    pair.a = h.UInt32(7)
+    template = pair.as_template()
+    template.set('b', 9)
+    assert bytes(template) == b'\x07\x00\x00\x00\x09'
+    assert template.get('a') == 7
@@ -1,3 +1,6 @@
+import copy
+import pickle
+
 import pytest
 
 import hydration as h
@@ -172,3 +175,144 @@ def test_dynamic_vec_size():
 
     for a1, a2 in zip(real_deal.vec.value, identical.vec.value):
         assert a1.aviv == a2.aviv
+
+
+def test_decode_consumed():
+    x = Shine()
+    data = b'\xff' * 3 + bytes(x) + b'trailing'
+
+    y = Shine()
+    assert y.decode(data, 3) == len(x)
+    assert x == y
+
+    vec = h.Vector('length', h.UInt16())
+    vec.length = 3
+    assert vec.decode(b'\x01\x00\x02\x00\x03\x00\x04\x00') == 6
+    assert vec == [1, 2, 3]
+
+
+class Packet(h.Struct):
+    length = h.InclusiveLengthField(h.UInt16)
+    magic = h.Bytes(2, b'hy')
+    payload_len = h.UInt32()
+    payload = h.Blob(payload_len)
+
+
+def test_bytes():
+    with pytest.raises(ValueError):
+        h.Bytes(2, b'abc')
+
+    packet = Packet(payload=b'hello')
+    assert packet.payload_len == 5
+    assert bytes(packet)[2:] == b'hy\x05\x00\x00\x00hello'
+
+    data = bytes(packet)
+    decoded = Packet.from_bytes(data)
+    assert decoded == packet
+    assert isinstance(decoded.payload.value, memoryview)
+    assert decoded.payload.value.obj is data
+
+    msg = h.Message(Packet(payload=b'12345678'))
+    assert msg[Packet].length == len(bytes(msg)) == 16
+
+    with pytest.raises(ValueError):
+        Packet.from_bytes(data[:-1])
+
+    # Decoded values are copied as bytes
+    copied = copy.deepcopy(decoded)
+    assert copied == packet
+    assert isinstance(copied.payload.value, bytes)
+    assert pickle.loads(pickle.dumps(decoded.payload)) == decoded.payload
+    assert decoded.as_template().get('magic') == decoded.magic
+
+
+def test_cached_sizes():
+    class Item(h.Struct, cached=True):
+        length = h.UInt8()
+        data = h.Vector(length)
+
+    class Items(h.Struct):
+        count = h.UInt16()
+        items = h.Vector(count, Item)
+        numbers = h.Vector(count, h.UInt32)
+
+    items = Items(items=[Item(data=[1] * i) for i in range(10)], numbers=range(10))
+    assert items.numbers.size == 40
+    assert len(items) == len(bytes(items))
+
+    # Changes of the items are noticed
+    items.items[3].data = [1] * 100
+    assert len(items) == len(bytes(items))
+    items.items.append(Item(data=[2, 3]))
+    assert len(items) == len(bytes(items))
+    assert (items / b'abc').size == len(bytes(items)) + 3
+
+
+def test_sizes_of_shared_fields():
+    class Item(h.Struct):
+        length = h.UInt8()
+        data = h.Vector(length)
+
+    class Items(h.Struct):
+        count = h.UInt8()
+        items = h.Vector(count, Item)
+
+    # The fields of a shallow copy are shared with the original
+    item = Item()
+    assert len(item) == 1
+    shallow = copy.copy(item)
+    item.data = [1, 2, 3]
+    assert len(item) == len(bytes(item)) == 4
+    assert len(shallow) == len(bytes(shallow)) == 4
+
+    # The fields of b are shared with a
+    a, b = Item(), Item()
+    assert len(b) == 1
+    a.value = b
+    b.data = [1, 2]
+    assert len(b) == len(bytes(b)) == 3
+
+    # The same item is in two vectors
+    item = Item()
+    first, second = Items(items=[item]), Items(items=[item])
+    assert len(first) == 2
+    item.data = [1, 2, 3]
+    assert len(first) == len(bytes(first)) == 5
+    assert len(second) == len(bytes(second)) == 5
+
+
+def test_in_place_mutation():
+    class Item(h.Struct):
+        x = h.UInt8()
+
+    class Items(h.Struct):
+        count = h.UInt16()
+        items = h.Vector(count, Item)
+        values = h.Array(3, h.UInt8(), validator=range(10))
+
+    items = Items()
+    data = items.items.data
+    for i in range(5):
+        items.items.append(Item(x=i))
+    items.items.extend([Item(x=5)])
+    items.items.insert(0, Item(x=9))
+    # The list isn't replaced, and the length of the vector follows it
+    assert items.items.data is data
+    assert len(items.items) == 7
+    assert items.items.pop().x == 5
+    assert len(items.items) == 6
+
+    # New items are tracked
+    size = len(items)
+    items.items[2].x = 100
+    assert bytes(items.items[2]) == b'\x64'
+    assert len(items) == size
+
+    items.values.append(1)
+    with pytest.raises(ValueError):
+        items.values.append(10)
+    with pytest.raises(ValueError):
+        items.values.extend([1, 2, 3])
+    assert items.values == [1]
+    items.values += [2, 3]
+    assert items.values == [1, 2, 3]